@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 with open("README.md", "r") as fh:
     LONG_DESCRIPTION = fh.read()
 
-TESTS_REQUIRE = ["selenium~=3.141", "pylint", "mock", "black", "bandit"]
+TESTS_REQUIRE = ["selenium~=3.141", "pylint", "mock", "black", "bandit", "pytest"]
 
 setup(
     name="webviz_sumo_experiments",
@@ -19,6 +19,10 @@ setup(
     },
     install_requires=[
         "webviz-config>=0.5.0",
+        "dash>=2.9",  # Patch and allow_duplicate
+        "plotly>=6",  # Typed array ({dtype, bdata}) trace data
+        "pyarrow>=8.0",
+        "httpx[http2]",
         "fmu-sumo@git+https://github.com/equinor/fmu-sumo@master",
         "sumo-wrapper-python@git+https://github.com/equinor/sumo-wrapper-python.git@master",
         "h11==0.11",  # ERROR: httpcore 0.15.0 has requirement h11<0.13,>=0.11, but you'll have h11 0.14.0 which is incompatible.
@@ -26,7 +30,7 @@ setup(
     tests_require=TESTS_REQUIRE,
     extras_require={"tests": TESTS_REQUIRE},
     setup_requires=["setuptools_scm~=3.2"],
-    python_requires="~=3.6",
+    python_requires=">=3.8",
     use_scm_version=True,
     zip_safe=False,
     classifiers=[
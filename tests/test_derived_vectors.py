@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from webviz_sumo_experiments.plugins.sumo_time_series.derived_vectors import (
+    DerivedVector,
+    DerivedVectorError,
+)
+
+
+def _dates(*dates: str) -> np.ndarray:
+    return np.array(dates, dtype="datetime64[ms]")
+
+
+@pytest.mark.parametrize(
+    "expression, name",
+    [
+        ("WWPR:OP_1/WLPR:OP_1", "WWPR:OP_1 / WLPR:OP_1"),
+        ("  rate( FOPT )", "rate(FOPT)"),
+        ("sum( WOPR:* )", "sum(WOPR:*)"),
+        ("FOPT - (FWPT - FGPT)", "FOPT - (FWPT - FGPT)"),
+        ("(FOPT - FWPT) - FGPT", "FOPT - FWPT - FGPT"),
+        ("(FOPT + FWPT) * 2", "(FOPT + FWPT) * 2"),
+        ("-(FOPT)", "-FOPT"),
+        ("FOPT * 1e3", "FOPT * 1000"),
+    ],
+)
+def test_name_is_normalized_expression(expression, name):
+    assert DerivedVector(expression).name == name
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["", "FOPT +", "2 * 3", "foo(FOPT)", "FOPT)", "(FOPT", "FOPT $ 2", "rate(FOPT"],
+)
+def test_invalid_expressions_raise(expression):
+    with pytest.raises(DerivedVectorError):
+        DerivedVector(expression)
+
+
+def test_minus_after_colon_is_part_of_the_vector_name():
+    available = ["WOPR:A-1H", "WOPR:A", "FOPT"]
+    assert DerivedVector("WOPR:A-1H").source_vectors(available) == ["WOPR:A-1H"]
+    assert DerivedVector("WOPR:A - FOPT").source_vectors(available) == [
+        "WOPR:A",
+        "FOPT",
+    ]
+
+
+def test_source_vectors_expand_patterns_without_duplicates():
+    derived = DerivedVector("sum(WOPR:*) / WOPR:OP_1")
+    available = ["FOPT", "WOPR:OP_1", "WOPR:OP_2", "WWPR:OP_1"]
+    assert derived.source_vectors(available) == ["WOPR:OP_1", "WOPR:OP_2"]
+
+
+@pytest.mark.parametrize("expression", ["FOPT / FNOPE", "sum(GOPR:*)"])
+def test_missing_source_vectors_raise(expression):
+    with pytest.raises(DerivedVectorError):
+        DerivedVector(expression).source_vectors(["FOPT", "WOPR:OP_1"])
+
+
+@pytest.mark.parametrize(
+    "expression, is_rate",
+    [
+        ("rate(FOPT)", True),
+        ("FOPR * 2", True),
+        ("2 * FOPR", True),
+        ("sum(WOPR:*)", True),
+        ("FOPR + FGPR", True),
+        ("FOPR + FOPT", False),
+        ("WWPR:OP_1 / WLPR:OP_1", False),
+        ("FOPT", False),
+    ],
+)
+def test_is_rate(expression, is_rate):
+    assert DerivedVector(expression).is_rate is is_rate
+
+
+def test_division_by_zero_gives_nan():
+    values = DerivedVector("FWPR / FLPR").evaluate(
+        _dates("2020-01-01", "2020-02-01"),
+        np.array([0, 0]),
+        {"FWPR": np.array([1.0, 1.0]), "FLPR": np.array([2.0, 0.0])},
+    )
+    np.testing.assert_array_equal(values, [0.5, np.nan])
+
+
+def test_constant_terms_are_broadcast():
+    values = DerivedVector("FOPT * 0 + 1").evaluate(
+        _dates("2020-01-01", "2020-02-01"),
+        np.array([0, 0]),
+        {"FOPT": np.array([3.0, 4.0])},
+    )
+    np.testing.assert_array_equal(values, [1.0, 1.0])
+
+
+def test_rate_is_per_realization_in_input_order():
+    # Rows are not sorted, and the realizations report on different dates
+    dates = _dates("2020-01-11", "2020-01-01", "2020-01-21", "2020-01-01")
+    reals = np.array([0, 1, 1, 0])
+    fopt = np.array([100.0, 0.0, 400.0, 0.0])
+    values = DerivedVector("rate(FOPT)").evaluate(dates, reals, {"FOPT": fopt})
+    np.testing.assert_array_equal(values, [10.0, np.nan, 20.0, np.nan])
+
+
+def test_sum_adds_matching_columns_only():
+    values = DerivedVector("sum(WOPR:*)").evaluate(
+        _dates("2020-01-01"),
+        np.array([0]),
+        {"WOPR:OP_1": np.array([1.0]), "WOPR:OP_2": np.array([2.0])},
+    )
+    np.testing.assert_array_equal(values, [3.0])
@@ -0,0 +1,107 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from webviz_sumo_experiments.plugins.sumo_time_series.resampling import (
+    Frequency,
+    date_grid,
+    is_rate,
+    resample_vector_table,
+)
+
+
+def _table(vector_name: str, rows: list) -> pa.Table:
+    dates, reals, values = zip(*rows)
+    return pa.table(
+        {
+            "DATE": pa.array(np.array(dates, dtype="datetime64[ms]")),
+            "REAL": pa.array(reals, type=pa.int64()),
+            vector_name: pa.array(values, type=pa.float64()),
+        }
+    )
+
+
+def _rows(table: pa.Table, vector_name: str) -> list:
+    return list(
+        zip(
+            table.column("DATE").to_numpy().astype("datetime64[D]").astype(str),
+            table.column("REAL").to_pylist(),
+            table.column(vector_name).to_pylist(),
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "vector_name, expected",
+    [
+        ("WOPR:OP_1", True),
+        ("FWIR", True),
+        ("GGPRH", True),
+        ("FOPT", False),
+        ("FPR", False),
+        ("WWCT:OP_1", False),
+    ],
+)
+def test_is_rate(vector_name, expected):
+    assert is_rate(vector_name) is expected
+
+
+def test_date_grid_starts_on_the_first_period_start_within_the_range():
+    grid = date_grid(
+        np.datetime64("2020-01-15", "s"),
+        np.datetime64("2020-04-01", "s"),
+        Frequency.MONTHLY,
+    )
+    assert grid.astype("datetime64[D]").astype(str).tolist() == [
+        "2020-02-01",
+        "2020-03-01",
+        "2020-04-01",
+    ]
+
+
+def test_raw_returns_the_table_unchanged():
+    table = _table("FOPT", [("2020-01-15", 0, 1.0)])
+    assert resample_vector_table(table, "FOPT", Frequency.RAW) is table
+
+
+def test_cumulatives_are_interpolated():
+    table = _table("FOPT", [("2020-03-01", 0, 60.0), ("2020-01-01", 0, 0.0)])
+    resampled = resample_vector_table(table, "FOPT", Frequency.MONTHLY)
+    assert _rows(resampled, "FOPT") == [
+        ("2020-01-01", 0, 0.0),
+        ("2020-02-01", 0, 31.0),
+        ("2020-03-01", 0, 60.0),
+    ]
+    assert resampled.schema.field("DATE").type == table.schema.field("DATE").type
+
+
+def test_rates_take_the_next_reported_rate():
+    table = _table("FOPR", [("2020-01-01", 0, 5.0), ("2020-03-01", 0, 7.0)])
+    resampled = resample_vector_table(table, "FOPR", Frequency.MONTHLY)
+    assert [value for _, _, value in _rows(resampled, "FOPR")] == [5.0, 7.0, 7.0]
+
+
+def test_stepped_overrides_the_vector_name():
+    table = _table("X", [("2020-01-01", 0, 5.0), ("2020-03-01", 0, 7.0)])
+    resampled = resample_vector_table(table, "X", Frequency.MONTHLY, stepped=True)
+    assert [value for _, _, value in _rows(resampled, "X")] == [5.0, 7.0, 7.0]
+
+
+def test_realizations_are_resampled_within_their_own_date_range():
+    table = _table(
+        "FOPT",
+        [
+            ("2020-01-01", 0, 0.0),
+            ("2020-03-01", 0, 60.0),
+            ("2020-02-01", 1, 100.0),
+            ("2020-03-01", 1, 129.0),
+        ],
+    )
+    resampled = resample_vector_table(table, "FOPT", Frequency.MONTHLY)
+    assert _rows(resampled, "FOPT") == [
+        ("2020-01-01", 0, 0.0),
+        ("2020-02-01", 0, 31.0),
+        ("2020-03-01", 0, 60.0),
+        ("2020-02-01", 1, 100.0),
+        ("2020-03-01", 1, 129.0),
+    ]
@@ -0,0 +1,51 @@
+import numpy as np
+import pyarrow as pa
+
+from webviz_sumo_experiments.plugins.sumo_time_series.views.time_series.view import (
+    calc_series_statistics,
+)
+
+
+def test_statistics_match_numpy_and_ignore_missing_values():
+    rng = np.random.default_rng(0)
+    dates = np.repeat(np.array(["2020-01-01", "2020-02-01"], dtype="datetime64[ms]"), 7)
+    values = rng.random(len(dates))
+    values[[1, 9]] = np.nan
+    table = pa.table(
+        {
+            "DATE": pa.array(dates),
+            "REAL": np.tile(np.arange(7), 2),
+            "FOPT": pa.array(values.tolist()[:-1] + [None], type=pa.float64()),
+        }
+    )
+
+    stats = calc_series_statistics(table, "FOPT")
+
+    assert stats.column("DATE").to_numpy().tolist() == list(np.unique(dates))
+    for row, date_values in enumerate([values[:7], values[7:13]]):
+        expected = date_values[~np.isnan(date_values)]
+        assert np.isclose(stats.column("mean")[row].as_py(), expected.mean())
+        assert stats.column("min")[row].as_py() == expected.min()
+        assert stats.column("max")[row].as_py() == expected.max()
+        # P10 is the high estimate, the 90th percentile
+        assert np.isclose(
+            stats.column("high_p10")[row].as_py(), np.percentile(expected, 90)
+        )
+        assert np.isclose(stats.column("p50")[row].as_py(), np.percentile(expected, 50))
+        assert np.isclose(
+            stats.column("low_p90")[row].as_py(), np.percentile(expected, 10)
+        )
+
+
+def test_single_realization_statistics_equal_its_value():
+    table = pa.table(
+        {
+            "DATE": pa.array(np.array(["2020-01-01"], dtype="datetime64[ms]")),
+            "REAL": [0],
+            "FOPT": [4.0],
+        }
+    )
+    stats = calc_series_statistics(table, "FOPT").to_pylist()[0]
+    assert [
+        stats[name] for name in ["mean", "min", "max", "high_p10", "p50", "low_p90"]
+    ] == [4.0] * 6
@@ -0,0 +1,53 @@
+import pytest
+
+from webviz_sumo_experiments.utils.sumo_query import (
+    MAX_BUCKETS,
+    bucket_keys,
+    build_query,
+    terms_aggregation,
+)
+
+
+def test_build_query_quotes_strings_only():
+    assert (
+        build_query({"data.name": "WOPR:OP_1", "fmu.iteration.id": 0, "note": 'a "b"'})
+        == 'data.name:"WOPR:OP_1" AND fmu.iteration.id:0 AND note:"a \\"b\\""'
+    )
+
+
+def test_terms_aggregation_sets_the_bucket_size():
+    assert terms_aggregation("class:table", "fmu.realization.id") == {
+        "query": "class:table",
+        "buckets": "fmu.realization.id",
+        "bucketsize": MAX_BUCKETS,
+        "size": 0,
+    }
+
+
+def test_bucket_keys():
+    response = {
+        "aggregations": {
+            "fmu.realization.id": {
+                "sum_other_doc_count": 0,
+                "buckets": [{"key": 0, "doc_count": 3}, {"key": 1, "doc_count": 3}],
+            }
+        }
+    }
+    assert bucket_keys(response, "fmu.realization.id") == [0, 1]
+
+
+def test_bucket_keys_without_aggregation():
+    assert bucket_keys({"hits": {"hits": []}}, "fmu.realization.id") == []
+
+
+def test_truncated_aggregation_raises():
+    response = {
+        "aggregations": {
+            "_sumo.parent_object": {
+                "sum_other_doc_count": 12,
+                "buckets": [{"key": "uuid", "doc_count": 1}],
+            }
+        }
+    }
+    with pytest.raises(ValueError):
+        bucket_keys(response, "_sumo.parent_object")
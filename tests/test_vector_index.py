@@ -0,0 +1,49 @@
+from webviz_sumo_experiments.plugins.sumo_time_series.vector_index import VectorIndex
+
+VECTORS = ["WOPR:OP_1", "WWCT:OP_1", "WOPR:OP_2", "FOPT", "OPX", "GOPR:OP"]
+
+
+def test_full_name_matches_rank_before_token_matches():
+    assert VectorIndex(VECTORS).search("op", max_hits=10) == [
+        "OPX",
+        "GOPR:OP",
+        "WOPR:OP_1",
+        "WWCT:OP_1",
+        "WOPR:OP_2",
+    ]
+
+
+def test_search_is_case_insensitive_and_stripped():
+    assert VectorIndex(VECTORS).search("  wopr:op_ ", max_hits=10) == [
+        "WOPR:OP_1",
+        "WOPR:OP_2",
+    ]
+
+
+def test_search_stops_at_max_hits():
+    assert VectorIndex(VECTORS).search("op", max_hits=2) == ["OPX", "GOPR:OP"]
+
+
+def test_empty_search_lists_the_first_names():
+    assert VectorIndex(VECTORS).search("", max_hits=2) == ["FOPT", "GOPR:OP"]
+
+
+def test_names_matching_both_ways_are_listed_once():
+    assert VectorIndex(["OP:OP"]).search("OP", max_hits=10) == ["OP:OP"]
+
+
+def test_no_match():
+    assert VectorIndex(VECTORS).search("XYZ", max_hits=10) == []
+
+
+def test_dropdown_options_keep_the_current_vector():
+    options = VectorIndex(VECTORS).dropdown_options(
+        "WOPR", max_hits=10, current_vector="FOPT"
+    )
+    assert options == [
+        {"label": "── Field ──", "value": "__Field__", "disabled": True},
+        {"label": "FOPT", "value": "FOPT"},
+        {"label": "── Well ──", "value": "__Well__", "disabled": True},
+        {"label": "WOPR:OP_1", "value": "WOPR:OP_1"},
+        {"label": "WOPR:OP_2", "value": "WOPR:OP_2"},
+    ]
@@ -0,0 +1,96 @@
+import numpy as np
+import pyarrow as pa
+
+from webviz_sumo_experiments.plugins.sumo_volumetrics.volumetric_index import (
+    VolumetricIndex,
+)
+
+
+def _index() -> VolumetricIndex:
+    return VolumetricIndex(
+        pa.table(
+            {
+                "REAL": [0, 0, 0, 1, 1, 1, 1],
+                "ZONE": ["A", "A", "B", "A", "B", "B", None],
+                "REGION": [1, 2, 1, 1, 1, 2, 1],
+                "FIPNAME": ["x"] * 7,
+                "STOIIP_OIL": [1.0, 2.0, 3.0, 10.0, 20.0, 30.0, 100.0],
+                "BULK": [1, 1, 1, 2, 2, 2, 2],
+            }
+        )
+    )
+
+
+def test_numeric_columns_are_responses():
+    index = _index()
+    assert index.selectors == ["ZONE", "REGION"]
+    assert index.responses == ["STOIIP_OIL", "BULK"]
+    np.testing.assert_array_equal(index.realizations, [0, 1])
+
+
+def test_sums_without_filters_include_all_rows():
+    np.testing.assert_array_equal(
+        _index().realization_sums("STOIIP_OIL", {}), [6.0, 160.0]
+    )
+
+
+def test_filters_combine_selectors():
+    index = _index()
+    np.testing.assert_array_equal(
+        index.realization_sums("STOIIP_OIL", {"ZONE": ["A"]}), [3.0, 10.0]
+    )
+    np.testing.assert_array_equal(
+        index.realization_sums("STOIIP_OIL", {"ZONE": ["A"], "REGION": [1]}),
+        [1.0, 10.0],
+    )
+
+
+def test_realizations_without_matching_rows_sum_to_zero():
+    np.testing.assert_array_equal(
+        _index().realization_sums("STOIIP_OIL", {"ZONE": ["B"], "REGION": [2]}),
+        [0.0, 30.0],
+    )
+
+
+def test_empty_and_unknown_filters_keep_all_rows():
+    np.testing.assert_array_equal(
+        _index().realization_sums("STOIIP_OIL", {"ZONE": [], "FACIES": ["Channel"]}),
+        [6.0, 160.0],
+    )
+
+
+def test_rows_without_a_selector_value_never_match_a_filter():
+    np.testing.assert_array_equal(
+        _index().realization_sums("STOIIP_OIL", {"ZONE": ["A", "B"]}),
+        [6.0, 60.0],
+    )
+
+
+def test_unknown_response_sums_to_zero():
+    np.testing.assert_array_equal(_index().realization_sums("GIIP", {}), [0.0, 0.0])
+
+
+def test_selector_values_are_sorted_without_missing_values():
+    index = _index()
+    assert index.selector_values("ZONE") == ["A", "B"]
+    assert index.selector_values("REGION") == [1, 2]
+    assert index.selector_values("FACIES") == []
+
+
+def test_statistics_follow_the_oil_industry_percentile_convention():
+    stats = _index().statistics({})
+    oil = np.array([6.0, 160.0])
+    assert stats["mean"][0] == oil.mean()
+    assert stats["p10"][0] == np.percentile(oil, 90)
+    assert stats["p90"][0] == np.percentile(oil, 10)
+    assert stats["min"][0] == 6.0 and stats["max"][0] == 160.0
+
+
+def test_empty_table_gives_nan_statistics():
+    index = VolumetricIndex(
+        pa.table(
+            {"REAL": pa.array([], pa.int64()), "STOIIP_OIL": pa.array([], pa.float64())}
+        )
+    )
+    assert index.realization_sums("STOIIP_OIL", {}).shape == (0,)
+    assert np.isnan(index.statistics({})["mean"]).all()
@@ -0,0 +1,277 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dash.development.base_component import Component
+from dash import html, dcc, callback, ctx, Input, Output, State, ALL, MATCH
+from fmu.sumo.explorer import Explorer
+import webviz_core_components as wcc
+
+from webviz_config.utils import StrEnum
+from webviz_config.webviz_plugin_subclasses import SettingsGroupABC
+
+from webviz_sumo_experiments import PerfTimer
+from webviz_sumo_experiments.utils.callback_profiler import profiled_callback
+from webviz_sumo_experiments.utils.callback_trace import traced_callback
+from webviz_sumo_experiments.utils.callback_utils import case_keys
+from webviz_sumo_experiments.utils.cancellation import uncancellable
+from webviz_sumo_experiments.utils.fetch_scheduler import FETCH_SCHEDULER
+from webviz_sumo_experiments.utils.sumo_provider import SumoDataProvider, SumoDataType
+
+
+class CaseSettings(SettingsGroupABC):
+    """Field, case and iteration selection of the Sumo plugins. Lists the
+    cases with data of `data_type`, looked up through the shared provider.
+
+    The initial selection is resolved server-side in a single callback on
+    page load, which renders the dropdowns with their options and values.
+    The callbacks chaining field to cases to iterations only run on later
+    user changes, and when the case list of the field is refreshed (cached
+    case lists are otherwise kept for a while, see `search_cache.TTLS`). If
+    given, `prefetch` is run in the background with the explorer, case and
+    iteration of the initial selection, so the view can start loading what it
+    shows first.
+    """
+
+    class Ids(StrEnum):
+        DUMMY_TRIGGER = "dummy-trigger"
+        SELECTION = "selection"
+        FIELD = "sumo-field"
+        REFRESH = "refresh-cases"
+
+    def __init__(
+        self,
+        provider: SumoDataProvider,
+        data_type: SumoDataType,
+        initial_case_name: List[str],
+        logger,
+        owner: str,
+        number_of_cases: int = 2,
+        prefetch: Optional[Callable[[Explorer, str, Any], None]] = None,
+    ) -> None:
+        super().__init__("Sumo cases")
+        self.number_of_cases = number_of_cases
+        self.provider = provider
+        self.data_type = data_type
+        self.initial_case_name = initial_case_name
+        self.logger = logger
+        self.owner = owner
+        self.prefetch = prefetch
+
+    def layout(self) -> List[Component]:
+        return [
+            html.Div(
+                children=[
+                    html.Div(
+                        style={"display": "none"},
+                        id=self.register_component_unique_id(
+                            CaseSettings.Ids.DUMMY_TRIGGER
+                        ),
+                    ),
+                    html.Div(
+                        id=self.register_component_unique_id(
+                            CaseSettings.Ids.SELECTION
+                        ),
+                        children=self._selection_layout(),
+                    ),
+                    html.Button(
+                        children="Refresh cases",
+                        id=self.register_component_unique_id(CaseSettings.Ids.REFRESH),
+                    ),
+                ]
+            )
+        ]
+
+    def _selection_layout(
+        self,
+        field_options: Optional[List[Dict]] = None,
+        field: Optional[str] = None,
+        case_options: Optional[List[Dict]] = None,
+        case_id: Optional[str] = None,
+        iteration_options: Optional[List[Dict]] = None,
+        iteration_id: Optional[Any] = None,
+    ) -> List[Component]:
+        # The selection is resolved server-side on each page load. Values
+        # restored by the browser could disagree with the options rendered for
+        # them without the chained callbacks correcting it, so nothing is
+        # persisted.
+        return [
+            wcc.Dropdown(
+                clearable=False,
+                persistence=False,
+                label="Field",
+                id=self.register_component_unique_id(CaseSettings.Ids.FIELD),
+                options=field_options or [],
+                value=field,
+            ),
+        ] + [
+            component
+            for case_key in case_keys(self.number_of_cases)
+            for component in (
+                wcc.Dropdown(
+                    clearable=False,
+                    persistence=False,
+                    label=f"Case {case_key}",
+                    id={
+                        "case": case_key,
+                        "comp": "case",
+                        "id": self.get_unique_id().to_string(),
+                    },
+                    placeholder="No valid cases",
+                    options=case_options or [],
+                    value=case_id,
+                ),
+                wcc.Dropdown(
+                    clearable=False,
+                    persistence=False,
+                    label=f"Iteration {case_key}",
+                    id={
+                        "case": case_key,
+                        "comp": "iteration",
+                        "id": self.get_unique_id().to_string(),
+                    },
+                    placeholder="No valid iterations",
+                    options=iteration_options or [],
+                    value=iteration_id,
+                ),
+            )
+        ]
+
+    def _case_options(
+        self, explorer: Explorer, field: str
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get the case options of a field, and the initial case"""
+        timer = PerfTimer()
+        case_ids = self.provider.case_uuids(explorer, field, self.data_type)
+        cases = [
+            {"label": self.provider.case_name(explorer, case_id), "value": case_id}
+            for case_id in case_ids
+        ]
+        self.logger.info(f"Got Sumo cases with {self.data_type} in {timer.lap_s()}")
+        if not cases:
+            return [], None
+
+        initial_case_id = cases[0]["value"]
+        if self.initial_case_name is not None:
+            for case in cases:
+                if self.initial_case_name in case["label"]:
+                    initial_case_id = case["value"]
+                    break
+        return cases, initial_case_id
+
+    def _iteration_options(
+        self, explorer: Explorer, case_id: Optional[str]
+    ) -> Tuple[List[Dict], Optional[Any]]:
+        """Get the iteration options of a case, and the initial iteration"""
+        timer = PerfTimer()
+        iterations = self.provider.iterations(explorer, case_id) if case_id else None
+        self.logger.info(f"Got Sumo iterations in {timer.lap_s()}")
+        if not iterations:
+            return [], None
+        return [
+            {"label": iteration["name"], "value": iteration["id"]}
+            for iteration in iterations
+        ], iterations[0]["id"]
+
+    def set_callbacks(self):
+        def comp_id(**kwargs):
+            comp_id = {
+                "id": self.get_unique_id().to_string(),
+            }
+            comp_id.update(kwargs)
+            return comp_id
+
+        @callback(
+            Output(
+                self.component_unique_id(CaseSettings.Ids.SELECTION).to_string(),
+                "children",
+            ),
+            Input(
+                self.component_unique_id(CaseSettings.Ids.DUMMY_TRIGGER).to_string(),
+                "children",
+            ),
+        )
+        @traced_callback(self.logger)
+        @profiled_callback(f"{self.owner}.CaseSettings")
+        def _set_initial_selection(_):
+            # The dropdowns are rendered with their values, so the chained
+            # callbacks below (prevent_initial_call) are not triggered by them
+            explorer = self.provider.explorer()
+            timer = PerfTimer()
+            fields = self.provider.fields(explorer)
+            self.logger.info(f"Got Sumo fields in {timer.lap_s()}")
+            field = fields[0] if fields else None
+            case_options, case_id = (
+                self._case_options(explorer, field) if field else ([], None)
+            )
+            iteration_options, iteration_id = self._iteration_options(explorer, case_id)
+            if self.prefetch is not None and iteration_id is not None:
+                FETCH_SCHEDULER.submit(
+                    ("prefetch", self.owner, case_id, iteration_id),
+                    uncancellable(self.prefetch),
+                    explorer,
+                    case_id,
+                    iteration_id,
+                )
+            return self._selection_layout(
+                field_options=[{"label": field, "value": field} for field in fields],
+                field=field,
+                case_options=case_options,
+                case_id=case_id,
+                iteration_options=iteration_options,
+                iteration_id=iteration_id,
+            )
+
+        @callback(
+            Output(
+                comp_id(comp="case", case=ALL),
+                "options",
+            ),
+            Output(
+                comp_id(comp="case", case=ALL),
+                "value",
+            ),
+            Input(
+                self.component_unique_id(CaseSettings.Ids.FIELD).to_string(),
+                "value",
+            ),
+            Input(
+                self.component_unique_id(CaseSettings.Ids.REFRESH).to_string(),
+                "n_clicks",
+            ),
+            prevent_initial_call=True,
+        )
+        @traced_callback(self.logger)
+        @profiled_callback(f"{self.owner}.CaseSettings")
+        def _set_cases(field: str, _n_clicks):
+            explorer = self.provider.explorer()
+            if (
+                ctx.triggered_id
+                == self.component_unique_id(CaseSettings.Ids.REFRESH).to_string()
+            ):
+                dropped = self.provider.invalidate_cases(field)
+                self.logger.info(f"Refreshing the cases of {field} ({dropped} cached)")
+            cases, initial_case_id = self._case_options(explorer, field)
+            return (
+                [cases] * self.number_of_cases,
+                [initial_case_id] * self.number_of_cases,
+            )
+
+        @callback(
+            Output(
+                comp_id(comp="iteration", case=MATCH),
+                "options",
+            ),
+            Output(
+                comp_id(comp="iteration", case=MATCH),
+                "value",
+            ),
+            Input(
+                comp_id(comp="case", case=MATCH),
+                "value",
+            ),
+            prevent_initial_call=True,
+        )
+        @traced_callback(self.logger)
+        @profiled_callback(f"{self.owner}.CaseSettings")
+        def _set_iterations(case_id: str):
+            explorer = self.provider.explorer()
+            return self._iteration_options(explorer, case_id)
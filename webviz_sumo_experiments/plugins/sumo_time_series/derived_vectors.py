@@ -0,0 +1,309 @@
+from fnmatch import fnmatchcase
+import re
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from .resampling import is_rate
+
+
+class DerivedVectorError(ValueError):
+    """Raised for invalid expressions, or when a case lacks a source vector"""
+
+
+class _Number(NamedTuple):
+    value: float
+
+
+class _Vector(NamedTuple):
+    name: str
+
+
+class _Sum(NamedTuple):
+    pattern: str
+    """Glob pattern of the summed vector names, e.g. WOPR:*"""
+
+
+class _Rate(NamedTuple):
+    arg: "_Node"
+
+
+class _Negate(NamedTuple):
+    arg: "_Node"
+
+
+class _BinaryOp(NamedTuple):
+    op: str
+    left: "_Node"
+    right: "_Node"
+
+
+_Node = Union[_Number, _Vector, _Sum, _Rate, _Negate, _BinaryOp]
+
+# Vector names are an Eclipse keyword, optionally followed by a colon and a
+# well, group, region or block name, e.g. FOPT, WOPR:A-1H, BPR:10,10,3.
+# A minus after the colon is part of the name, so subtracting from such a
+# vector needs a space before the minus.
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<sum>sum\(\s*(?P<pattern>[^()\s]+)\s*\))"
+    r"|(?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+    r"|(?P<name>[A-Za-z][A-Za-z0-9_]*(?::[A-Za-z0-9_,.\-]+)?)"
+    r"|(?P<op>[-+*/()])"
+    r")"
+)
+_FUNCTIONS = {"rate": _Rate}
+
+
+def _tokenize(expression: str) -> List[tuple]:
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None or match.end() == pos:
+            raise DerivedVectorError(f"unexpected '{expression[pos:].strip()}'")
+        kind = match.lastgroup if match.lastgroup != "pattern" else "sum"
+        value = match.group("pattern") if kind == "sum" else match.group(kind)
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser of derived vector expressions:
+
+    expr  := term (("+" | "-") term)*
+    term  := unary (("*" | "/") unary)*
+    unary := "-" unary | atom
+    atom  := number | vector | sum(pattern) | function "(" expr ")"
+             | "(" expr ")"
+    """
+
+    def __init__(self, tokens: List[tuple]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self) -> _Node:
+        node = self._expr()
+        if self.pos < len(self.tokens):
+            raise DerivedVectorError(f"unexpected '{self.tokens[self.pos][1]}'")
+        return node
+
+    def _peek(self) -> Optional[tuple]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self) -> tuple:
+        token = self._peek()
+        if token is None:
+            raise DerivedVectorError("unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def _expect(self, value: str) -> None:
+        if self._take() != ("op", value):
+            raise DerivedVectorError(f"expected '{value}'")
+
+    def _expr(self) -> _Node:
+        node = self._term()
+        while self._peek() in (("op", "+"), ("op", "-")):
+            node = _BinaryOp(self._take()[1], node, self._term())
+        return node
+
+    def _term(self) -> _Node:
+        node = self._unary()
+        while self._peek() in (("op", "*"), ("op", "/")):
+            node = _BinaryOp(self._take()[1], node, self._unary())
+        return node
+
+    def _unary(self) -> _Node:
+        if self._peek() == ("op", "-"):
+            self._take()
+            return _Negate(self._unary())
+        return self._atom()
+
+    def _atom(self) -> _Node:
+        kind, value = self._take()
+        if kind == "number":
+            return _Number(float(value))
+        if kind == "sum":
+            return _Sum(value)
+        if kind == "name":
+            if self._peek() == ("op", "("):
+                if value not in _FUNCTIONS:
+                    raise DerivedVectorError(f"unknown function '{value}'")
+                self._take()
+                node = _FUNCTIONS[value](self._expr())
+                self._expect(")")
+                return node
+            return _Vector(value)
+        if (kind, value) == ("op", "("):
+            node = self._expr()
+            self._expect(")")
+            return node
+        raise DerivedVectorError(f"unexpected '{value}'")
+
+
+def _format(node: _Node, parent_precedence: int = 0) -> str:
+    if isinstance(node, _Number):
+        return f"{node.value:g}"
+    if isinstance(node, _Vector):
+        return node.name
+    if isinstance(node, _Sum):
+        return f"sum({node.pattern})"
+    if isinstance(node, _Rate):
+        return f"rate({_format(node.arg)})"
+    if isinstance(node, _Negate):
+        return f"-{_format(node.arg, 3)}"
+    precedence = 1 if node.op in "+-" else 2
+    # The right operand is bracketed at equal precedence: a - (b - c)
+    text = (
+        f"{_format(node.left, precedence)} {node.op} "
+        f"{_format(node.right, precedence + 1)}"
+    )
+    return f"({text})" if precedence < parent_precedence else text
+
+
+class DerivedVector:
+    """A vector computed from summary vectors, e.g. `rate(FOPT)` (average
+    rate from a cumulative), `WWPR:OP_1 / WLPR:OP_1` (water cut) or
+    `sum(WOPR:*)` (sum over wells).
+
+    Expressions combine vectors and numbers with + - * / and parentheses.
+    `sum(pattern)` sums the vectors whose names match a glob pattern, and
+    `rate(expr)` converts a cumulative to the average rate per day over the
+    preceding report interval. Division by zero gives NaN.
+
+    The expression is evaluated with NumPy on whole columns, i.e. all
+    realizations at once.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self._root = _Parser(_tokenize(expression)).parse()
+        if not self._patterns(self._root):
+            raise DerivedVectorError("the expression uses no vectors")
+        self.name = _format(self._root)
+        """Normalized expression, used as the vector name"""
+
+    @property
+    def is_rate(self) -> bool:
+        """Whether the vector is a rate, which is resampled stepwise"""
+        return bool(_is_rate(self._root))
+
+    def source_vectors(self, available: List[str]) -> List[str]:
+        """Get the summary vectors the expression reads, given the vectors
+        available in a case"""
+        names = set(available)
+        sources: Dict[str, None] = {}
+        for pattern, is_glob in self._patterns(self._root):
+            matches = (
+                [name for name in available if fnmatchcase(name, pattern)]
+                if is_glob
+                else [pattern] if pattern in names else []
+            )
+            if not matches:
+                raise DerivedVectorError(f"no vector {pattern} in the case")
+            sources.update(dict.fromkeys(matches))
+        return list(sources)
+
+    def evaluate(
+        self, dates: np.ndarray, reals: np.ndarray, columns: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Evaluate the expression on row aligned DATE, REAL and source vector
+        columns, see `source_vectors`"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = _evaluate(self._root, dates, reals, columns)
+        return np.broadcast_to(np.asarray(values, dtype=np.float64), dates.shape)
+
+    def _patterns(self, node: _Node) -> List[tuple]:
+        if isinstance(node, _Vector):
+            return [(node.name, False)]
+        if isinstance(node, _Sum):
+            return [(node.pattern, True)]
+        if isinstance(node, (_Rate, _Negate)):
+            return self._patterns(node.arg)
+        if isinstance(node, _BinaryOp):
+            return self._patterns(node.left) + self._patterns(node.right)
+        return []
+
+
+def _is_rate(node: _Node) -> Optional[bool]:
+    """Rate-ness of a node, None for numbers, which do not change it"""
+    if isinstance(node, _Number):
+        return None
+    if isinstance(node, _Rate):
+        return True
+    if isinstance(node, _Vector):
+        return is_rate(node.name)
+    if isinstance(node, _Sum):
+        return is_rate(node.pattern)
+    if isinstance(node, _Negate):
+        return _is_rate(node.arg)
+    left, right = _is_rate(node.left), _is_rate(node.right)
+    if node.op in "+-":
+        return False if False in (left, right) else left or right
+    # Scaling a rate by a number keeps it a rate; a ratio of vectors does not
+    if right is None:
+        return left
+    if left is None and node.op == "*":
+        return right
+    return False
+
+
+def _evaluate(
+    node: _Node,
+    dates: np.ndarray,
+    reals: np.ndarray,
+    columns: Dict[str, np.ndarray],
+) -> Union[float, np.ndarray]:
+    if isinstance(node, _Number):
+        return node.value
+    if isinstance(node, _Vector):
+        return columns[node.name]
+    if isinstance(node, _Sum):
+        total = np.zeros(len(dates))
+        for name, values in columns.items():
+            if fnmatchcase(name, node.pattern):
+                total += values
+        return total
+    if isinstance(node, _Negate):
+        return -_evaluate(node.arg, dates, reals, columns)
+    if isinstance(node, _Rate):
+        return _average_rate(
+            np.broadcast_to(_evaluate(node.arg, dates, reals, columns), dates.shape),
+            dates,
+            reals,
+        )
+    left = _evaluate(node.left, dates, reals, columns)
+    right = _evaluate(node.right, dates, reals, columns)
+    if node.op == "+":
+        return left + right
+    if node.op == "-":
+        return left - right
+    if node.op == "*":
+        return left * right
+    result = np.divide(left, right)
+    return np.where(np.isfinite(result), result, np.nan)
+
+
+def _average_rate(
+    cumulative: np.ndarray, dates: np.ndarray, reals: np.ndarray
+) -> np.ndarray:
+    """Average rate per day over the report interval preceding each date, for
+    all realizations in one pass. The first date of a realization has no
+    preceding interval and gets NaN."""
+    order = np.lexsort((dates, reals))
+    values = cumulative[order]
+    days = dates[order].astype("datetime64[s]").astype(np.int64) / 86400.0
+    same_real = reals[order][1:] == reals[order][:-1]
+
+    interval_days = np.diff(days)
+    rates = np.full(len(values), np.nan)
+    rates[1:] = np.where(
+        same_real & (interval_days > 0),
+        np.diff(values) / np.where(interval_days > 0, interval_days, 1.0),
+        np.nan,
+    )
+    result = np.empty_like(rates)
+    result[order] = rates
+    return result
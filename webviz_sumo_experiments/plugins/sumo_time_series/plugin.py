@@ -4,6 +4,11 @@ from webviz_config import WebvizPluginABC
 from webviz_config.utils import StrEnum
 from webviz_config.webviz_instance_info import WEBVIZ_INSTANCE_INFO, WebvizRunMode
 from fmu.sumo.explorer import Explorer, Case
+from webviz_sumo_experiments.utils.callback_profiler import configure_profiling
+from webviz_sumo_experiments.utils.response_compression import (
+    compress_callback_responses,
+)
+from webviz_sumo_experiments.utils.sumo_provider import sumo_data_provider
 from .views.time_series.view import TimeSeriesView
 
 
@@ -11,15 +16,26 @@ class SumoTimeSeries(WebvizPluginABC):
     class Ids(StrEnum):
         PLOT_VIEW = "plot-view"
 
-    def __init__(self, app, env: str = "dev", initial_case_name: str = None):
+    def __init__(
+        self,
+        app,
+        env: str = "dev",
+        initial_case_name: str = None,
+        number_of_cases: int = 2,
+        profile_dir: str = None,
+        profile_min_seconds: float = 0.0,
+    ):
         super().__init__(stretch=True)
         self.interactive = WEBVIZ_INSTANCE_INFO.run_mode != WebvizRunMode.PORTABLE
+        compress_callback_responses(WEBVIZ_INSTANCE_INFO.dash_app.server)
+        if profile_dir is not None:
+            configure_profiling(profile_dir, min_duration_s=profile_min_seconds)
 
         self.add_view(
             TimeSeriesView(
-                env=env,
-                interactive=self.interactive,
+                provider=sumo_data_provider(env, self.interactive),
                 initial_case_name=initial_case_name,
+                number_of_cases=number_of_cases,
             ),
             SumoTimeSeries.Ids.PLOT_VIEW,
         )
@@ -0,0 +1,100 @@
+import re
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from webviz_config.utils import StrEnum
+
+
+class RealizationSubset(StrEnum):
+    ALL = "all"
+    SAMPLE = "sample"
+    LIST = "list"
+    PERCENTILES = "percentiles"
+
+
+class RealizationSelection(NamedTuple):
+    subset: RealizationSubset = RealizationSubset.ALL
+    sample_size: Optional[int] = None
+    """Number of realizations drawn for the SAMPLE subset"""
+    realizations: Optional[str] = None
+    """Realization list like "0-9, 15" for the LIST subset"""
+
+
+# Seed of the realization sample, so the same realizations are drawn on
+# every redraw and by every worker
+SAMPLE_SEED = 0
+
+
+def parse_realizations(text: Optional[str]) -> List[int]:
+    """Parse a realization list like "0-9, 15, 20-25" """
+    reals: List[int] = []
+    for part in re.split(r"[,\s]+", text or ""):
+        match = re.fullmatch(r"(\d+)(?:-(\d+))?", part)
+        if match is None:
+            continue
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) is not None else first
+        reals.extend(range(first, last + 1))
+    return reals
+
+
+def sample_realizations(reals: np.ndarray, count: int) -> np.ndarray:
+    """Get a deterministic random sample of `count` realizations"""
+    reals = np.unique(reals)
+    if count >= len(reals):
+        return reals
+    rng = np.random.default_rng(SAMPLE_SEED)
+    return np.sort(rng.choice(reals, size=max(count, 0), replace=False))
+
+
+def realizations_closest_to_percentiles(
+    table: pa.Table, vector_name: str, stat_table: pa.Table
+) -> np.ndarray:
+    """Get the realizations with the smallest mean squared distance to the
+    P10, P50 and P90 curves of the ensemble statistics (see
+    `calc_series_statistics`)"""
+    dates = table.column("DATE").to_numpy()
+    values = table.column(vector_name).to_numpy(zero_copy_only=False)
+    real_ids, real_pos = np.unique(table.column("REAL").to_numpy(), return_inverse=True)
+    stat_dates = stat_table.column("DATE").to_numpy()
+    date_idx = np.minimum(np.searchsorted(stat_dates, dates), len(stat_dates) - 1)
+    if len(real_ids) == 0:
+        return real_ids
+    counts = np.bincount(real_pos, minlength=len(real_ids))
+
+    closest = set()
+    for stat in ["high_p10", "p50", "low_p90"]:
+        curve = stat_table.column(stat).to_numpy(zero_copy_only=False)
+        squared = np.nan_to_num((values - curve[date_idx]) ** 2, nan=np.inf)
+        distance = np.bincount(real_pos, weights=squared, minlength=len(real_ids))
+        closest.add(real_ids[np.argmin(distance / np.maximum(counts, 1))])
+    return np.array(sorted(closest))
+
+
+def select_realizations(
+    table: pa.Table,
+    vector_name: str,
+    selection: RealizationSelection,
+    stat_table: Optional[pa.Table] = None,
+) -> pa.Table:
+    """Get the rows of the selected realizations. The statistics table is
+    only needed for the percentile subset."""
+    subset = selection.subset
+    if subset == RealizationSubset.SAMPLE and selection.sample_size:
+        reals = sample_realizations(
+            table.column("REAL").to_numpy(), selection.sample_size
+        )
+    elif subset == RealizationSubset.LIST and selection.realizations:
+        reals = np.array(parse_realizations(selection.realizations), dtype=np.int64)
+    elif subset == RealizationSubset.PERCENTILES and stat_table is not None:
+        reals = realizations_closest_to_percentiles(table, vector_name, stat_table)
+    else:
+        return table
+    return table.filter(
+        pc.is_in(
+            table.column("REAL"),
+            value_set=pa.array(reals).cast(table.schema.field("REAL").type),
+        )
+    )
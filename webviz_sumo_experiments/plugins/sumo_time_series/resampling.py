@@ -0,0 +1,107 @@
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from webviz_config.utils import StrEnum
+
+
+class Frequency(StrEnum):
+    RAW = "raw"
+    DAILY = "daily"
+    MONTHLY = "monthly"
+    YEARLY = "yearly"
+
+
+_NUMPY_UNITS = {
+    Frequency.DAILY: "D",
+    Frequency.MONTHLY: "M",
+    Frequency.YEARLY: "Y",
+}
+
+
+def is_rate(vector_name: str) -> bool:
+    """Check if a summary vector is a rate from its Eclipse keyword, e.g.
+    WOPR:OP_1, FWIR and GGPRH are rates, while FOPT (cumulative), FPR
+    (pressure) and WWCT (ratio) are not."""
+    keyword = vector_name.split(":")[0]
+    if keyword.endswith("H"):
+        keyword = keyword[:-1]
+    quantity = keyword[1:]
+    return len(quantity) >= 3 and quantity.endswith(("PR", "IR"))
+
+
+def date_grid(
+    min_date: np.datetime64, max_date: np.datetime64, frequency: Frequency
+) -> np.ndarray:
+    """Get the dates of the given frequency (first day of the day, month or
+    year) within [min_date, max_date], in seconds"""
+    unit = _NUMPY_UNITS[frequency]
+    first = min_date.astype(f"datetime64[{unit}]")
+    if first.astype("datetime64[s]") < min_date:
+        first += 1
+    last = max_date.astype(f"datetime64[{unit}]")
+    return np.arange(first, last + 1).astype("datetime64[s]")
+
+
+def resample_vector_table(
+    table: pa.Table,
+    vector_name: str,
+    frequency: Frequency,
+    stepped: Optional[bool] = None,
+) -> pa.Table:
+    """Resample a DATE/REAL/vector table to a common date grid for all
+    realizations.
+
+    Cumulatives and state vectors are linearly interpolated to the grid dates.
+    Rates are stepped: a rate reported at a date is the average over the
+    preceding report interval, so each grid date takes the rate of the first
+    report date on or after it. `stepped` overrides whether the vector is
+    resampled as a rate, e.g. for derived vectors.
+
+    All realizations are resampled in one pass. Each realization's dates are
+    shifted by a realization specific offset so the concatenated dates are
+    globally sorted, which allows a single searchsorted/interp call.
+    """
+    if frequency == Frequency.RAW or table.num_rows == 0:
+        return table
+
+    table = table.take(
+        pc.sort_indices(table, sort_keys=[("REAL", "ascending"), ("DATE", "ascending")])
+    )
+    reals = table.column("REAL").to_numpy()
+    dates = table.column("DATE").to_numpy().astype("datetime64[s]")
+    values = table.column(vector_name).to_numpy(zero_copy_only=False)
+
+    real_ids, real_starts = np.unique(reals, return_index=True)
+    real_ends = np.append(real_starts[1:], len(reals)) - 1
+    grid = date_grid(dates.min(), dates.max(), frequency)
+
+    # Grid points per realization, restricted to the realization's own date range
+    in_range = (grid[np.newaxis, :] >= dates[real_starts][:, np.newaxis]) & (
+        grid[np.newaxis, :] <= dates[real_ends][:, np.newaxis]
+    )
+    real_idx, grid_idx = np.nonzero(in_range)
+    out_dates = grid[grid_idx]
+
+    real_pos = np.repeat(
+        np.arange(len(real_ids)), np.diff(np.append(real_starts, len(reals)))
+    )
+    span = (dates.max() - dates.min()).astype(np.int64) + 1
+    offset_dates = (dates - dates.min()).astype(np.int64) + real_pos * span
+    offset_grid = (out_dates - dates.min()).astype(np.int64) + real_idx * span
+
+    if stepped is None:
+        stepped = is_rate(vector_name)
+    if stepped:
+        out_values = values[np.searchsorted(offset_dates, offset_grid, side="left")]
+    else:
+        out_values = np.interp(offset_grid, offset_dates, values)
+
+    return pa.table(
+        {
+            "DATE": pa.array(out_dates).cast(table.schema.field("DATE").type),
+            "REAL": pa.array(real_ids[real_idx]).cast(table.schema.field("REAL").type),
+            vector_name: out_values,
+        }
+    )
@@ -1,37 +1,41 @@
-from typing import List
+import logging
+from typing import List, Optional
 from fmu.sumo.explorer import Explorer
 import pyarrow as pa
 import time
 
+from webviz_sumo_experiments.utils.case_access import case_scope
+from webviz_sumo_experiments.utils.cancellation import check_cancelled
+from webviz_sumo_experiments.utils.memory_budget import (
+    MEMORY_BUDGET,
+    new_spill_path,
+    read_spilled,
+)
+from webviz_sumo_experiments.utils.search_cache import QueryType, cached_search
+from webviz_sumo_experiments.utils.sumo_query import build_query
+from webviz_sumo_experiments.utils.sumo_search import blob_size
+from webviz_sumo_experiments.utils.sumo_transport import sumo_download, sumo_get
 
-def get_cases_with_smry_data(explorer: Explorer, field: str):
-    start_s = time.perf_counter()
-    hits = explorer.sumo.get(
-        "/search",
-        query=f"class:table AND \
-                masterdata.smda.field.identifier:{field} AND \
-                data.name:summary AND \
-                fmu.realization.id:0 AND \
-                fmu.iteration.id:0",
-        select="_sumo.parent_object",
-    )["hits"]["hits"]
-    if not hits:
-        return []
-
-    return [hit["_source"]["_sumo"]["parent_object"] for hit in hits]
+LOGGER = logging.getLogger(__name__)
 
 
 def get_smry_vector_names(
     explorer: Explorer, case_uuid: str, iteration_id: str
 ) -> List[str]:
     start_s = time.perf_counter()
-    hits = explorer.sumo.get(
-        "/search",
-        query=f"_sumo.parent_object:{case_uuid} AND \
-              class:table AND \
-              data.name:summary AND \
-              fmu.iteration.id:{iteration_id} AND \
-              fmu.realization.id:0",
+    hits = cached_search(
+        explorer,
+        QueryType.VECTOR_NAMES,
+        cache_scope=case_scope(explorer, case_uuid),
+        query=build_query(
+            {
+                "_sumo.parent_object": case_uuid,
+                "class": "table",
+                "data.name": "summary",
+                "fmu.iteration.id": iteration_id,
+                "fmu.realization.id": 0,
+            }
+        ),
         size=1,
         select="data.spec.columns",
     )["hits"]["hits"]
@@ -45,25 +49,57 @@ def get_smry_vector_names(
 
 
 def get_vector_data(
-    explorer: Explorer, case_uuid: str, vector_name: str, iteration_id: str
-):
+    explorer: Explorer,
+    case_uuid: str,
+    vector_name: str,
+    iteration_id: str,
+    columns: Optional[List[str]] = None,
+) -> Optional[pa.Table]:
     start_s = time.perf_counter()
-    hits = explorer.sumo.get(
+    hits = sumo_get(
+        explorer,
         "/search",
-        query=f'_sumo.parent_object:{case_uuid} AND \
-              class:table AND \
-              data.name:"{vector_name}" AND \
-              fmu.iteration.id:{iteration_id}',
+        query=build_query(
+            {
+                "_sumo.parent_object": case_uuid,
+                "class": "table",
+                "data.name": vector_name,
+                "fmu.iteration.id": iteration_id,
+            }
+        ),
         size=1,
-        select=False,
+        select="_sumo.blob_size",
     )["hits"]["hits"]
     if not hits:
         return None
     obj_uuid = hits[0]["_id"]
-    arwfile = explorer.sumo.get(f"/objects('{obj_uuid}')/blob")
-    with pa.ipc.open_file(arwfile) as reader:
-        table = reader.read_pandas()
+
+    with MEMORY_BUDGET.reserve(blob_size(hits[0])) as in_memory:
+        if in_memory:
+            arwfile = sumo_get(explorer, f"/objects('{obj_uuid}')/blob")
+            check_cancelled()
+            # The record batches reference the downloaded buffer directly (no
+            # copy), and projecting columns only drops references to the
+            # unused ones.
+            with pa.ipc.open_file(pa.BufferReader(pa.py_buffer(arwfile))) as reader:
+                table = reader.read_all()
+        else:
+            LOGGER.info(f"Spilling vector data for {vector_name} to disk")
+            path = new_spill_path()
+            sumo_download(explorer, f"/objects('{obj_uuid}')/blob", path)
+            table = read_spilled(path)
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
     time_now = time.perf_counter()
     elapsed = time_now - start_s
     print(f"Got vector data for {vector_name} in {elapsed:.3f}s")
     return table
+
+
+def combine_vector_tables(
+    date_table: Optional[pa.Table], vector_table: Optional[pa.Table], vector_name: str
+) -> Optional[pa.Table]:
+    """Join a DATE/REAL table with the row aligned table of a vector"""
+    if date_table is None or vector_table is None:
+        return None
+    return date_table.append_column(vector_name, vector_table.column(vector_name))
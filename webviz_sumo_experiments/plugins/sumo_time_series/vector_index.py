@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from collections import OrderedDict
+import threading
+from typing import Dict, Hashable, List, Tuple
+
+from fmu.sumo.explorer import Explorer
+
+from webviz_sumo_experiments.utils.case_access import case_scope
+from .sumo_requests import get_smry_vector_names
+
+# Vector type from the first letter of the Eclipse summary keyword
+VECTOR_TYPES = {
+    "F": "Field",
+    "G": "Group",
+    "W": "Well",
+    "R": "Region",
+    "B": "Block",
+    "C": "Connection",
+    "S": "Segment",
+    "A": "Aquifer",
+}
+VECTOR_TYPE_ORDER = list(VECTOR_TYPES.values()) + ["Other"]
+
+
+def vector_type(vector_name: str) -> str:
+    return VECTOR_TYPES.get(vector_name[:1].upper(), "Other")
+
+
+class VectorIndex:
+    """Prefix index over summary vector names.
+
+    Every vector is indexed both by its full name and by each of the
+    `:`-separated tokens of the name, so "OP_1" finds "WOPR:OP_1" as well as
+    "WWCT:OP_1". Keys are kept sorted so a prefix lookup is a binary search
+    followed by a scan over the matching range only.
+    """
+
+    def __init__(self, vector_names: List[str]) -> None:
+        self.vector_names = sorted(vector_names)
+        self._names = set(self.vector_names)
+        full_keys = []
+        token_keys = []
+        for name in self.vector_names:
+            full_keys.append((name.upper(), name))
+            tokens = name.split(":")
+            for token in tokens[1:]:
+                if token:
+                    token_keys.append((token.upper(), name))
+        full_keys.sort()
+        token_keys.sort()
+        self._full_keys = full_keys
+        self._token_keys = token_keys
+
+    def __contains__(self, vector_name: str) -> bool:
+        return vector_name in self._names
+
+    def __len__(self) -> int:
+        return len(self.vector_names)
+
+    @staticmethod
+    def _prefix_matches(keys: List[Tuple[str, str]], prefix: str):
+        for idx in range(bisect_left(keys, (prefix, "")), len(keys)):
+            key, name = keys[idx]
+            if not key.startswith(prefix):
+                break
+            yield name
+
+    def search(self, text: str, max_hits: int) -> List[str]:
+        """Get up to `max_hits` vector names matching the search text.
+        Full name prefix matches are ranked before token prefix matches."""
+        prefix = (text or "").strip().upper()
+        if not prefix:
+            return self.vector_names[:max_hits]
+        hits: Dict[str, None] = {}
+        for keys in (self._full_keys, self._token_keys):
+            for name in self._prefix_matches(keys, prefix):
+                hits[name] = None
+                if len(hits) >= max_hits:
+                    return list(hits)
+        return list(hits)
+
+    def dropdown_options(
+        self, text: str, max_hits: int, current_vector: str = None
+    ) -> List[dict]:
+        """Get dropdown options for the best matches grouped by vector type,
+        with a disabled header option per group. The current vector is always
+        included so the dropdown does not lose its value while searching."""
+        hits = self.search(text, max_hits)
+        if current_vector in self and current_vector not in hits:
+            hits.append(current_vector)
+        grouped: Dict[str, List[str]] = {}
+        for name in hits:
+            grouped.setdefault(vector_type(name), []).append(name)
+
+        options = []
+        for vtype in VECTOR_TYPE_ORDER:
+            if vtype not in grouped:
+                continue
+            options.append(
+                {"label": f"── {vtype} ──", "value": f"__{vtype}__", "disabled": True}
+            )
+            options.extend({"label": name, "value": name} for name in grouped[vtype])
+        return options
+
+
+_MAX_INDEXES = 32
+_INDEXES: "OrderedDict[Tuple[Hashable, str, str], VectorIndex]" = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_vector_index(
+    explorer: Explorer, case_uuid: str, iteration_id: str
+) -> VectorIndex:
+    """Get the vector index for a case and iteration, building it from the
+    summary vector names on first use."""
+    key = (case_scope(explorer, case_uuid), case_uuid, str(iteration_id))
+    with _INDEXES_LOCK:
+        if key in _INDEXES:
+            _INDEXES.move_to_end(key)
+            return _INDEXES[key]
+
+    index = VectorIndex(
+        get_smry_vector_names(
+            explorer=explorer, case_uuid=case_uuid, iteration_id=iteration_id
+        )
+    )
+    if not index:
+        return index
+    with _INDEXES_LOCK:
+        _INDEXES[key] = index
+        while len(_INDEXES) > _MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return index
@@ -8,15 +8,25 @@ import webviz_core_components as wcc
 from webviz_config.utils import StrEnum
 from webviz_config.webviz_plugin_subclasses import SettingsGroupABC
 
+from webviz_sumo_experiments.utils.callback_utils import case_keys
+from ...resampling import Frequency
+from ...realization_selection import RealizationSubset
+
 
 class TimeSeriesSettings(SettingsGroupABC):
     class Ids(StrEnum):
         VECTOR_A = "sumo-vectora"
         VECTOR_B = "sumo-vectorb"
         AGGREGATION = "sumo-aggregation"
+        RESAMPLING = "sumo-resampling"
+        REALIZATION_SUBSET = "sumo-realization-subset"
+        SAMPLE_SIZE = "sumo-sample-size"
+        REALIZATIONS = "sumo-realizations"
+        DERIVED = "sumo-derived"
 
-    def __init__(self) -> None:
+    def __init__(self, number_of_cases: int = 2) -> None:
         super().__init__("Time Series")
+        self.number_of_cases = number_of_cases
 
     def layout(self) -> List[Component]:
         return [
@@ -24,24 +34,17 @@ class TimeSeriesSettings(SettingsGroupABC):
                 children=[
                     wcc.Dropdown(
                         clearable=False,
-                        label="Vector Case A",
+                        label=f"Vector Case {case_key}",
                         id={
-                            "case": "A",
+                            "case": case_key,
                             "comp": "vector",
                             "id": self.get_unique_id().to_string(),
                         },
                         placeholder="No vectors found",
-                    ),
-                    wcc.Dropdown(
-                        clearable=False,
-                        label="Vector Case B",
-                        id={
-                            "case": "B",
-                            "comp": "vector",
-                            "id": self.get_unique_id().to_string(),
-                        },
-                        placeholder="Try '01_drogon_design_summary'",
-                    ),
+                    )
+                    for case_key in case_keys(self.number_of_cases)
+                ]
+                + [
                     wcc.RadioItems(
                         label="Mode",
                         id=self.register_component_unique_id(
@@ -53,6 +56,73 @@ class TimeSeriesSettings(SettingsGroupABC):
                         ],
                         value="realization",
                     ),
+                    wcc.RadioItems(
+                        label="Resampling frequency",
+                        id=self.register_component_unique_id(
+                            TimeSeriesSettings.Ids.RESAMPLING
+                        ),
+                        options=[
+                            {"label": "Raw (report steps)", "value": Frequency.RAW},
+                            {"label": "Daily", "value": Frequency.DAILY},
+                            {"label": "Monthly", "value": Frequency.MONTHLY},
+                            {"label": "Yearly", "value": Frequency.YEARLY},
+                        ],
+                        value=Frequency.RAW,
+                    ),
+                    wcc.RadioItems(
+                        label="Realizations (statistics use all)",
+                        id=self.register_component_unique_id(
+                            TimeSeriesSettings.Ids.REALIZATION_SUBSET
+                        ),
+                        options=[
+                            {"label": "All", "value": RealizationSubset.ALL},
+                            {
+                                "label": "Random sample",
+                                "value": RealizationSubset.SAMPLE,
+                            },
+                            {"label": "List", "value": RealizationSubset.LIST},
+                            {
+                                "label": "Closest to P10/P50/P90",
+                                "value": RealizationSubset.PERCENTILES,
+                            },
+                        ],
+                        value=RealizationSubset.ALL,
+                    ),
+                    wcc.LabeledContainer(
+                        label="Sample size",
+                        children=dcc.Input(
+                            id=self.register_component_unique_id(
+                                TimeSeriesSettings.Ids.SAMPLE_SIZE
+                            ),
+                            type="number",
+                            min=1,
+                            step=1,
+                            value=100,
+                            debounce=True,
+                        ),
+                    ),
+                    wcc.LabeledContainer(
+                        label="Realization list",
+                        children=dcc.Input(
+                            id=self.register_component_unique_id(
+                                TimeSeriesSettings.Ids.REALIZATIONS
+                            ),
+                            type="text",
+                            placeholder="e.g. 0-9, 15",
+                            debounce=True,
+                        ),
+                    ),
+                    wcc.LabeledContainer(
+                        label="Derived vector (replaces the vectors above)",
+                        children=dcc.Input(
+                            id=self.register_component_unique_id(
+                                TimeSeriesSettings.Ids.DERIVED
+                            ),
+                            type="text",
+                            placeholder="e.g. rate(FOPT), sum(WOPR:*)",
+                            debounce=True,
+                        ),
+                    ),
                 ]
             )
         ]
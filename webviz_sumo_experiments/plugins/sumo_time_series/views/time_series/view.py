@@ -1,23 +1,103 @@
+from collections import defaultdict
+from concurrent.futures import Future, TimeoutError, as_completed
 from io import StringIO
 import logging
-from typing import List
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-import flask
 from dash.development.base_component import Component
-from dash import html, dcc, callback, Input, Output, no_update, State, MATCH, ALL
+from dash import (
+    html,
+    dcc,
+    callback,
+    clientside_callback,
+    Input,
+    Output,
+    no_update,
+    State,
+    MATCH,
+    ALL,
+    Patch,
+    ctx,
+)
 import numpy as np
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import webviz_core_components as wcc
 import plotly.graph_objects as go
-import plotly.express as px
 from fmu.sumo.explorer import Explorer
 from webviz_config.utils import StrEnum
 from webviz_config.webviz_plugin_subclasses import ViewABC, ViewElementABC
 
 from webviz_sumo_experiments import PerfTimer
+from webviz_sumo_experiments.utils.callback_profiler import profiled_callback
+from webviz_sumo_experiments.utils.cancellation import (
+    PAGE_ID_JS,
+    cancellable_callback,
+    check_cancelled,
+)
+from webviz_sumo_experiments.utils.callback_trace import traced_callback
+from webviz_sumo_experiments.utils.callback_utils import (
+    triggered_case,
+    case_keys_for_input,
+    case_color,
+)
+from webviz_sumo_experiments.utils.figure_encoding import (
+    typed_array,
+    date_typed_array,
+)
+from webviz_sumo_experiments.utils.case_access import case_scope
+from webviz_sumo_experiments.plugins.shared_settings.case_settings import CaseSettings
+from webviz_sumo_experiments.utils.fetch_scheduler import FETCH_SCHEDULER
+from webviz_sumo_experiments.utils.sumo_provider import SumoDataProvider, SumoDataType
 from .time_series_settings import TimeSeriesSettings
-from .case_settings import CaseSettings
-from ...sumo_requests import get_smry_vector_names, get_vector_data
+from ...sumo_requests import (
+    combine_vector_tables,
+    get_vector_data,
+)
+from ...derived_vectors import DerivedVector, DerivedVectorError
+from ...vector_index import get_vector_index
+from ...resampling import Frequency, resample_vector_table
+from ...realization_selection import (
+    RealizationSelection,
+    RealizationSubset,
+    select_realizations,
+)
+
+# Max number of vectors sent to the vector dropdown per search
+MAX_VECTOR_OPTIONS = 100
+# Max time the figure waits for the data of all cases before drawing the cases
+# that are ready, and polling for the others
+FIRST_RESPONSE_S = 1.0
+
+# The traces of both modes are sent with the figure, tagged with the modes
+# they are shown in (`with_modes`), and switching mode only toggles their
+# visibility in the browser.
+TOGGLE_MODE_JS = """
+function(aggregation, figure) {
+    if (!figure || !figure.data) {
+        return window.dash_clientside.no_update;
+    }
+    return Object.assign({}, figure, {
+        data: figure.data.map(function(trace) {
+            var modes = (trace.meta && trace.meta.modes) || [];
+            return Object.assign({}, trace, {
+                visible: modes.indexOf(aggregation) >= 0
+            });
+        })
+    });
+}
+"""
+
+
+class CaseFetches(NamedTuple):
+    """Fetches of the data of a case, see `TimeSeriesView._submit_case_fetches`"""
+
+    date: Future
+    case_name: Future
+    vectors: Dict[str, Future]
+
+    def futures(self) -> List[Future]:
+        return [self.date, self.case_name, *self.vectors.values()]
 
 
 class TimeSeriesPlot(ViewElementABC):
@@ -26,6 +106,11 @@ class TimeSeriesPlot(ViewElementABC):
         INTERVAL = "interval"
         LOG = "log"
         CLEARLOG = "clearlog"
+        PAGE_ID = "page-id"
+        TRACE_COUNTS = "trace-counts"
+        TRACE_SELECTION = "trace-selection"
+        PROGRESS = "progress"
+        FETCH_POLL = "fetch-poll"
 
     def __init__(self) -> None:
         super().__init__(flex_grow=8)
@@ -42,6 +127,32 @@ class TimeSeriesPlot(ViewElementABC):
                         },
                     ),
                 ),
+                # Random id of the page, see cancellable_callback
+                dcc.Store(
+                    id=self.register_component_unique_id(TimeSeriesPlot.Ids.PAGE_ID)
+                ),
+                # Number of traces per case, None for cases still loading
+                dcc.Store(
+                    id=self.register_component_unique_id(
+                        TimeSeriesPlot.Ids.TRACE_COUNTS
+                    ),
+                ),
+                # Selection the trace counts were drawn for
+                dcc.Store(
+                    id=self.register_component_unique_id(
+                        TimeSeriesPlot.Ids.TRACE_SELECTION
+                    ),
+                ),
+                html.Div(
+                    id=self.register_component_unique_id(TimeSeriesPlot.Ids.PROGRESS)
+                ),
+                # Polls for the data of cases still loading, while any are
+                dcc.Interval(
+                    id=self.register_component_unique_id(TimeSeriesPlot.Ids.FETCH_POLL),
+                    interval=500,
+                    n_intervals=0,
+                    disabled=True,
+                ),
                 dcc.Interval(
                     id=self.register_component_unique_id(TimeSeriesPlot.Ids.INTERVAL),
                     interval=1000,
@@ -67,9 +178,9 @@ class TimeSeriesView(ViewABC):
 
     def __init__(
         self,
-        env: str,
-        interactive: bool,
+        provider: SumoDataProvider,
         initial_case_name: str = None,
+        number_of_cases: int = 2,
     ) -> None:
         super().__init__("Shared settings")
         logFormatter = logging.Formatter(
@@ -84,18 +195,23 @@ class TimeSeriesView(ViewABC):
         self.logger.addHandler(stream_handler)
         self.add_settings_group(
             CaseSettings(
-                env=env,
+                provider=provider,
+                data_type=SumoDataType.SUMMARY,
                 initial_case_name=initial_case_name,
-                interactive=interactive,
                 logger=self.logger,
+                owner="SumoTimeSeries",
+                number_of_cases=number_of_cases,
+                prefetch=self._prefetch_initial_case,
             ),
             TimeSeriesView.Ids.CASESETTINGS,
         )
-        self.add_settings_group(TimeSeriesSettings(), TimeSeriesView.Ids.TIMESETTINGS)
+        self.add_settings_group(
+            TimeSeriesSettings(number_of_cases=number_of_cases),
+            TimeSeriesView.Ids.TIMESETTINGS,
+        )
         self.add_view_element(TimeSeriesPlot(), TimeSeriesView.Ids.PLOT)
 
-        self.env = env
-        self.interactive = interactive
+        self.provider = provider
         self.set_callbacks()
 
     def layout(self) -> List[Component]:
@@ -109,6 +225,285 @@ class TimeSeriesView(ViewABC):
             )
         ]
 
+    def _prefetch_initial_case(
+        self, explorer: Explorer, case: str, iteration: str
+    ) -> None:
+        """Start loading the vector index and the first vector of the initial
+        case, which the vector dropdowns and then the figure ask for next"""
+        vector_index = get_vector_index(
+            explorer=explorer, case_uuid=case, iteration_id=iteration
+        )
+        if vector_index:
+            self._submit_case_fetches(
+                explorer, case, iteration, [vector_index.vector_names[0]]
+            )
+
+    def _submit_case_fetches(
+        self, explorer: Explorer, case: str, iteration: str, vectors: List[str]
+    ) -> CaseFetches:
+        """Submit the fetches of the DATE/REAL table, the case name and the
+        given vectors of a case, all at once"""
+        # Decoded tables are shared with the other worker processes, and
+        # between all users with access to the case
+        scope = case_scope(explorer, case)
+        date_key = (scope, "smry", case, iteration, "DATE")
+        vector_keys = {
+            vector: (scope, "smry", case, iteration, vector) for vector in vectors
+        }
+        return CaseFetches(
+            date=FETCH_SCHEDULER.submit(
+                date_key,
+                self.provider.table_store.get_or_fetch,
+                date_key,
+                get_vector_data,
+                explorer,
+                case_uuid=case,
+                vector_name="DATE",
+                iteration_id=iteration,
+                columns=["DATE", "REAL"],
+            ),
+            case_name=FETCH_SCHEDULER.submit(
+                (scope, "case_name", case),
+                self.provider.case_name,
+                explorer,
+                case_uuid=case,
+            ),
+            vectors={
+                vector: FETCH_SCHEDULER.submit(
+                    vector_key,
+                    self.provider.table_store.get_or_fetch,
+                    vector_key,
+                    get_vector_data,
+                    explorer,
+                    case_uuid=case,
+                    vector_name=vector,
+                    iteration_id=iteration,
+                    columns=[vector],
+                )
+                for vector, vector_key in vector_keys.items()
+            },
+        )
+
+    def _submit_derived_fetches(
+        self, explorer: Explorer, case: str, iteration: str, derived: DerivedVector
+    ) -> CaseFetches:
+        """Submit the fetches of a case needed for a derived vector. If the
+        derived vector has been computed before, only the DATE/REAL table and
+        the case name are fetched."""
+        scope = case_scope(explorer, case)
+        if (
+            self.provider.table_store.get(_derived_key(scope, case, iteration, derived))
+            is not None
+        ):
+            return self._submit_case_fetches(explorer, case, iteration, [])
+        vector_index = get_vector_index(
+            explorer=explorer, case_uuid=case, iteration_id=iteration
+        )
+        return self._submit_case_fetches(
+            explorer, case, iteration, derived.source_vectors(vector_index.vector_names)
+        )
+
+    def _derived_vector_table(
+        self,
+        explorer: Explorer,
+        case: str,
+        iteration: str,
+        derived: DerivedVector,
+        date_table: pa.Table,
+        vector_tables: Dict[str, Optional[pa.Table]],
+    ) -> Optional[pa.Table]:
+        """Get the table of a derived vector, row aligned with the DATE/REAL
+        table. Computed results are kept in the shared table store.
+
+        `vector_tables` may lack source vectors, e.g. when the stored result
+        was evicted after `_submit_derived_fetches` found it. The missing
+        sources are then fetched before computing."""
+
+        def compute() -> Optional[pa.Table]:
+            vector_index = get_vector_index(
+                explorer=explorer, case_uuid=case, iteration_id=iteration
+            )
+            try:
+                sources = derived.source_vectors(vector_index.vector_names)
+            except DerivedVectorError as exc:
+                self.logger.info(f"{derived.name} in case {case}: {exc}")
+                return None
+            tables = dict(vector_tables)
+            missing = [vector for vector in sources if vector not in tables]
+            if missing:
+                fetches = self._submit_case_fetches(explorer, case, iteration, missing)
+                tables.update(
+                    {
+                        vector: future.result()
+                        for vector, future in fetches.vectors.items()
+                    }
+                )
+            if any(
+                tables[vector] is None or vector not in tables[vector].column_names
+                for vector in sources
+            ):
+                return None
+            values = derived.evaluate(
+                date_table.column("DATE").to_numpy(),
+                date_table.column("REAL").to_numpy(),
+                {
+                    vector: tables[vector].column(vector).to_numpy(zero_copy_only=False)
+                    for vector in sources
+                },
+            )
+            return pa.table({derived.name: values})
+
+        return self.provider.table_store.get_or_fetch(
+            _derived_key(case_scope(explorer, case), case, iteration, derived), compute
+        )
+
+    def _traces_for_cases(
+        self,
+        explorer: Explorer,
+        selections: Dict[int, Tuple[str, str, str]],
+        aggregation: str,
+        frequency: Frequency,
+        selection: RealizationSelection,
+        timer: PerfTimer,
+        timeout_s: Optional[float] = None,
+        derived: Optional[DerivedVector] = None,
+    ) -> Dict[int, Optional[List[dict]]]:
+        """Fetch the data of the selected (case, iteration, vector) per case
+        index concurrently, building the traces of each case as soon as its
+        data has arrived. Cases without data map to None. If `derived` is
+        given, it is shown instead of the selected vectors, and its source
+        vectors are fetched.
+
+        Cases whose data has not arrived within `timeout_s` are left out; their
+        fetches keep running and are joined when the traces are requested
+        again."""
+        traces: Dict[int, Optional[List[dict]]] = {}
+        fetches: Dict[int, CaseFetches] = {}
+        for idx, (case, iteration, vector) in selections.items():
+            if case is None or iteration is None or vector is None:
+                traces[idx] = []
+            elif derived is not None:
+                try:
+                    fetches[idx] = self._submit_derived_fetches(
+                        explorer, case, iteration, derived
+                    )
+                except DerivedVectorError as exc:
+                    self.logger.info(f"{derived.name} in case {case}: {exc}")
+                    traces[idx] = None
+            else:
+                fetches[idx] = self._submit_case_fetches(
+                    explorer, case, iteration, [vector]
+                )
+
+        # Identical fetches are shared between cases, so a future can complete
+        # the data of several cases.
+        cases_for_future: Dict[Future, List[int]] = defaultdict(list)
+        for idx, case_fetches in fetches.items():
+            for future in case_fetches.futures():
+                cases_for_future[future].append(idx)
+
+        try:
+            for future in as_completed(cases_for_future, timeout=timeout_s):
+                for idx in cases_for_future[future]:
+                    if idx in traces or not all(
+                        f.done() for f in fetches[idx].futures()
+                    ):
+                        continue
+                    check_cancelled()
+                    date_table = fetches[idx].date.result()
+                    case_name = fetches[idx].case_name.result()
+                    vector_tables = {
+                        vector: future.result()
+                        for vector, future in fetches[idx].vectors.items()
+                    }
+                    case, iteration, vector = selections[idx]
+                    if derived is not None and date_table is not None:
+                        vector = derived.name
+                        vector_table = self._derived_vector_table(
+                            explorer,
+                            case,
+                            iteration,
+                            derived,
+                            date_table,
+                            vector_tables,
+                        )
+                    else:
+                        vector_table = vector_tables.get(vector)
+                    table = combine_vector_tables(date_table, vector_table, vector)
+                    if table is None:
+                        traces[idx] = None
+                        continue
+                    self.logger.info(
+                        f"got vector data for {case_name} : {timer.lap_s()}"
+                    )
+                    traces[idx] = self._build_case_traces(
+                        table,
+                        case_name=case_name,
+                        iteration=iteration,
+                        vector=vector,
+                        aggregation=aggregation,
+                        frequency=frequency,
+                        selection=selection,
+                        color=case_color(idx),
+                        timer=timer,
+                        stepped=derived.is_rate if derived is not None else None,
+                    )
+        except TimeoutError:
+            self.logger.info(
+                f"still loading {len(selections) - len(traces)} cases : {timer.lap_s()}"
+            )
+        return traces
+
+    def _build_case_traces(
+        self,
+        table: pa.Table,
+        case_name: str,
+        iteration: str,
+        vector: str,
+        aggregation: str,
+        frequency: Frequency,
+        selection: RealizationSelection,
+        color: str,
+        timer: PerfTimer,
+        stepped: Optional[bool] = None,
+    ) -> List[dict]:
+        if frequency != Frequency.RAW:
+            table = resample_vector_table(table, vector, frequency, stepped=stepped)
+            self.logger.info(f"resampled to {frequency} : {timer.lap_s()}")
+        stat_table = calc_series_statistics(table, vector)
+        if selection.subset == RealizationSubset.ALL:
+            realization_table = table
+            stat_modes = ["aggregation"]
+        else:
+            # Only a subset of the realizations is drawn, together with the
+            # statistics of the full ensemble
+            realization_table = select_realizations(
+                table, vector, selection, stat_table
+            )
+            stat_modes = ["realization", "aggregation"]
+            self.logger.info(
+                f"selected {len(pc.unique(realization_table.column('REAL')))} "
+                f"realizations : {timer.lap_s()}"
+            )
+        realization_traces = plotly_realization_traces_for_vector(
+            realization_table,
+            case_name=case_name,
+            vector_name=vector,
+            iteration_id=iteration,
+            color=color,
+        )
+        stat_traces = plotly_aggregation_traces_for_vector(
+            table,
+            case_name=case_name,
+            vector_name=vector,
+            iteration_id=iteration,
+            color=color,
+            stat_table=stat_table,
+        )
+        return with_modes(
+            realization_traces, ["realization"], aggregation
+        ) + with_modes(stat_traces, stat_modes, aggregation)
+
     def set_callbacks(self) -> None:
         def case_settings_id(**kwargs):
             comp_id = {
@@ -131,6 +526,12 @@ class TimeSeriesView(ViewABC):
                 .to_string()
             )
 
+        clientside_callback(
+            PAGE_ID_JS,
+            Output(view_comp_id(TimeSeriesPlot.Ids.PAGE_ID), "data"),
+            Input(view_comp_id(TimeSeriesPlot.Ids.PAGE_ID), "id"),
+        )
+
         @callback(
             Output(
                 vector_settings(case=MATCH, comp="vector"),
@@ -148,28 +549,57 @@ class TimeSeriesView(ViewABC):
                 case_settings_id(case=MATCH, comp="iteration"),
                 "value",
             ),
+            Input(
+                vector_settings(case=MATCH, comp="vector"),
+                "search_value",
+            ),
             State(
                 vector_settings(case=MATCH, comp="vector"),
                 "value",
             ),
+            State(view_comp_id(TimeSeriesPlot.Ids.PAGE_ID), "data"),
         )
-        def _get_vectors(case_uuid, iteration_id, current_vector):
-            if self.interactive:
-                explorer = Explorer(env=self.env, interactive=self.interactive)
-            else:
-                explorer = Explorer(
-                    env=self.env,
-                    token=flask.request.headers["X-Auth-Request-Access-Token"],
-                )
+        @traced_callback(self.logger)
+        @profiled_callback("SumoTimeSeries.TimeSeriesView")
+        @cancellable_callback(self.logger, view_comp_id(TimeSeriesPlot.Ids.PAGE_ID))
+        def _get_vectors(
+            case_uuid, iteration_id, search_value, current_vector, _page_id
+        ):
+            explorer = self.provider.explorer()
             timer = PerfTimer()
 
-            vectors = get_smry_vector_names(
+            # The index is built once per case and iteration, after that both
+            # case changes and searches are served from memory.
+            vector_index = get_vector_index(
                 explorer=explorer, case_uuid=case_uuid, iteration_id=iteration_id
             )
-            self.logger.info(f"get_smry_vector_names: {timer.lap_s()}")
-            if vectors:
-                vec_opts = [{"label": vector, "value": vector} for vector in vectors]
-                vec_val = current_vector if current_vector in vectors else vectors[0]
+            self.logger.info(f"get_vector_index: {timer.lap_s()}")
+
+            if (
+                isinstance(ctx.triggered_id, dict)
+                and ctx.triggered_id.get("comp") == "vector"
+            ):
+                # Clearing the search text keeps the options of the last search
+                if not search_value:
+                    return no_update, no_update
+                return (
+                    vector_index.dropdown_options(
+                        search_value,
+                        max_hits=MAX_VECTOR_OPTIONS,
+                        current_vector=current_vector,
+                    ),
+                    no_update,
+                )
+
+            if vector_index:
+                vec_val = (
+                    current_vector
+                    if current_vector in vector_index
+                    else vector_index.vector_names[0]
+                )
+                vec_opts = vector_index.dropdown_options(
+                    "", max_hits=MAX_VECTOR_OPTIONS, current_vector=vec_val
+                )
             else:
                 vec_opts = []
                 vec_val = None
@@ -178,6 +608,10 @@ class TimeSeriesView(ViewABC):
 
         @callback(
             Output(view_comp_id(TimeSeriesPlot.Ids.GRAPH), "figure"),
+            Output(view_comp_id(TimeSeriesPlot.Ids.TRACE_COUNTS), "data"),
+            Output(view_comp_id(TimeSeriesPlot.Ids.TRACE_SELECTION), "data"),
+            Output(view_comp_id(TimeSeriesPlot.Ids.PROGRESS), "children"),
+            Output(view_comp_id(TimeSeriesPlot.Ids.FETCH_POLL), "disabled"),
             Input(
                 case_settings_id(case=ALL, comp="case"),
                 "value",
@@ -191,93 +625,243 @@ class TimeSeriesView(ViewABC):
                 "value",
             ),
             Input(
+                self.settings_groups()[1]
+                .component_unique_id(TimeSeriesSettings.Ids.RESAMPLING)
+                .to_string(),
+                "value",
+            ),
+            Input(
+                self.settings_groups()[1]
+                .component_unique_id(TimeSeriesSettings.Ids.REALIZATION_SUBSET)
+                .to_string(),
+                "value",
+            ),
+            Input(
+                self.settings_groups()[1]
+                .component_unique_id(TimeSeriesSettings.Ids.SAMPLE_SIZE)
+                .to_string(),
+                "value",
+            ),
+            Input(
+                self.settings_groups()[1]
+                .component_unique_id(TimeSeriesSettings.Ids.REALIZATIONS)
+                .to_string(),
+                "value",
+            ),
+            Input(
+                self.settings_groups()[1]
+                .component_unique_id(TimeSeriesSettings.Ids.DERIVED)
+                .to_string(),
+                "value",
+            ),
+            Input(view_comp_id(TimeSeriesPlot.Ids.FETCH_POLL), "n_intervals"),
+            State(
                 self.settings_groups()[1]
                 .component_unique_id(TimeSeriesSettings.Ids.AGGREGATION)
                 .to_string(),
                 "value",
             ),
+            State(view_comp_id(TimeSeriesPlot.Ids.TRACE_COUNTS), "data"),
+            State(view_comp_id(TimeSeriesPlot.Ids.TRACE_SELECTION), "data"),
+            State(view_comp_id(TimeSeriesPlot.Ids.PAGE_ID), "data"),
         )
-        def _get_vectors(
+        @traced_callback(self.logger)
+        @profiled_callback("SumoTimeSeries.TimeSeriesView")
+        @cancellable_callback(
+            self.logger,
+            view_comp_id(TimeSeriesPlot.Ids.PAGE_ID),
+            own_key_triggers=[view_comp_id(TimeSeriesPlot.Ids.FETCH_POLL)],
+        )
+        def _update_figure(
             cases,
             iterations,
             vectors,
+            frequency: str,
+            subset: str,
+            sample_size: Optional[int],
+            realizations: Optional[str],
+            expression: Optional[str],
+            _n_polls,
             aggregation: str,
+            trace_counts,
+            trace_selection,
+            _page_id,
         ):
-            if self.interactive:
-                explorer = Explorer(env=self.env, interactive=self.interactive)
-            else:
-                explorer = Explorer(
-                    env=self.env,
-                    token=flask.request.headers["X-Auth-Request-Access-Token"],
-                )
+            explorer = self.provider.explorer()
+
+            derived = None
+            if expression and expression.strip():
+                try:
+                    derived = DerivedVector(expression)
+                except DerivedVectorError as exc:
+                    return (
+                        no_update,
+                        no_update,
+                        no_update,
+                        f"Invalid derived vector: {exc}",
+                        True,
+                    )
+                vectors = [derived.name] * len(cases)
 
-            fig = go.Figure()
             if not cases or not iterations or not vectors:
-                return no_update
+                return no_update, no_update, no_update, no_update, no_update
             timer = PerfTimer()
-            try:
-                for case, iteration, vector, color in zip(
-                    cases, iterations, vectors, ["red", "blue"]
-                ):
-
-                    if (
-                        case is not None
-                        and iteration is not None
-                        and vector is not None
-                    ):
-                        df = get_vector_data(
-                            explorer,
-                            case_uuid=case,
-                            iteration_id=iteration,
-                            vector_name="DATE",
+            selection = RealizationSelection(
+                subset=RealizationSubset(subset),
+                sample_size=sample_size,
+                realizations=realizations,
+            )
+            selections = dict(enumerate(zip(cases, iterations, vectors)))
+            keys = case_keys_for_input()
+            same_cases = trace_counts is not None and len(trace_counts) == len(cases)
+            current_selection = [
+                cases,
+                iterations,
+                vectors,
+                frequency,
+                subset,
+                sample_size,
+                realizations,
+                expression,
+            ]
+
+            # Polled: add the traces of the cases that were still loading.
+            # A poll sent while a redraw for a new selection is running makes
+            # the browser drop that redraw, so the poll redraws instead of
+            # patching the figure of the old selection.
+            polled = ctx.triggered_id == view_comp_id(TimeSeriesPlot.Ids.FETCH_POLL)
+            if polled and same_cases and trace_selection == current_selection:
+                traces_per_case = self._traces_for_cases(
+                    explorer,
+                    {
+                        idx: selections[idx]
+                        for idx, count in enumerate(trace_counts)
+                        if count is None
+                    },
+                    aggregation=aggregation,
+                    frequency=Frequency(frequency),
+                    selection=selection,
+                    timer=timer,
+                    timeout_s=FIRST_RESPONSE_S,
+                    derived=derived,
+                )
+                patched_figure = Patch()
+                for idx, traces in sorted(traces_per_case.items()):
+                    if traces is None:
+                        self.logger.info(
+                            f"Failed to get vector data for case {cases[idx]} : {timer.lap_s()}"
                         )
-                        self.logger.info(f"got date data : {timer.lap_s()}")
-                        df[vector] = get_vector_data(
-                            explorer,
-                            case_uuid=case,
-                            vector_name=vector,
-                            iteration_id=iteration,
-                        )[vector]
-                        self.logger.info(f"got vector data : {timer.lap_s()}")
-                        if aggregation == "aggregation":
-                            fig.add_traces(
-                                plotly_aggregation_traces_for_vector(
-                                    df,
-                                    case_id=explorer.get_case_by_id(case).case_name,
-                                    vector_name=vector,
-                                    iteration_id=iteration,
-                                    color=color,
-                                )
-                            )
-                        else:
-                            fig.add_traces(
-                                plotly_realization_traces_for_vector(
-                                    df,
-                                    case_id=explorer.get_case_by_id(case).case_name,
-                                    vector_name=vector,
-                                    iteration_id=iteration,
-                                    color=color,
-                                )
-                            )
-
-            except TypeError:
-                self.logger.info(
-                    f"Failed to get vector data for case {case} : {timer.lap_s()}"
+                        traces = []
+                    _replace_case_traces(patched_figure, trace_counts, idx, traces)
+                pending = [keys[idx] for idx, c in enumerate(trace_counts) if c is None]
+                return (
+                    patched_figure,
+                    trace_counts,
+                    no_update,
+                    _progress_text(pending),
+                    not pending,
+                )
+
+            # Only a single case changed: fetch that case and replace its traces
+            changed_case = triggered_case()
+            if changed_case is not None and same_cases and not polled:
+                idx = keys.index(changed_case)
+                traces_per_case = self._traces_for_cases(
+                    explorer,
+                    {idx: selections[idx]},
+                    aggregation=aggregation,
+                    frequency=Frequency(frequency),
+                    selection=selection,
+                    timer=timer,
+                    timeout_s=FIRST_RESPONSE_S,
+                    derived=derived,
+                )
+                traces = traces_per_case.get(idx, [])
+                if traces is None:
+                    self.logger.info(
+                        f"Failed to get vector data for case {cases[idx]} : {timer.lap_s()}"
+                    )
+                    return no_update, no_update, no_update, no_update, no_update
+                patched_figure = Patch()
+                _replace_case_traces(patched_figure, trace_counts, idx, traces)
+                if idx not in traces_per_case:
+                    trace_counts[idx] = None
+                pending = [keys[idx] for idx, c in enumerate(trace_counts) if c is None]
+                return (
+                    patched_figure,
+                    trace_counts,
+                    current_selection,
+                    _progress_text(pending),
+                    not pending,
                 )
-                return no_update
 
-            return fig
+            traces_per_case = self._traces_for_cases(
+                explorer,
+                selections,
+                aggregation=aggregation,
+                frequency=Frequency(frequency),
+                selection=selection,
+                timer=timer,
+                timeout_s=FIRST_RESPONSE_S,
+                derived=derived,
+            )
+            # Trace dates are sent as epoch milliseconds. Cases still loading
+            # are drawn when polled.
+            fig = go.Figure(layout={"xaxis": {"type": "date"}})
+            trace_counts = []
+            for idx, case in enumerate(cases):
+                if idx not in traces_per_case:
+                    trace_counts.append(None)
+                    continue
+                traces = traces_per_case[idx]
+                if traces is None:
+                    self.logger.info(
+                        f"Failed to get vector data for case {case} : {timer.lap_s()}"
+                    )
+                    return no_update, no_update, no_update, no_update, no_update
+                fig.add_traces(traces)
+                trace_counts.append(len(traces))
+
+            pending = [keys[idx] for idx, c in enumerate(trace_counts) if c is None]
+            return (
+                fig,
+                trace_counts,
+                current_selection,
+                _progress_text(pending),
+                not pending,
+            )
+
+        # Switching mode is done in the browser, without a server round trip
+        clientside_callback(
+            TOGGLE_MODE_JS,
+            Output(
+                view_comp_id(TimeSeriesPlot.Ids.GRAPH), "figure", allow_duplicate=True
+            ),
+            Input(
+                self.settings_groups()[1]
+                .component_unique_id(TimeSeriesSettings.Ids.AGGREGATION)
+                .to_string(),
+                "value",
+            ),
+            State(view_comp_id(TimeSeriesPlot.Ids.GRAPH), "figure"),
+            prevent_initial_call=True,
+        )
 
         @callback(
             Output(view_comp_id(TimeSeriesPlot.Ids.LOG), "children"),
             Input(view_comp_id(TimeSeriesPlot.Ids.INTERVAL), "n_intervals"),
         )
         def _update_log(_):
-            logstring = self.log_stream.getvalue()
-            logstring = logstring.split("\n")
-            logstring.reverse()
-            logstring = ("\n").join(logstring)
-            return logstring
+            # Newest records first. Indented lines continue the record above
+            # them (e.g. a call waterfall), and keep their order.
+            records = []
+            for line in self.log_stream.getvalue().split("\n"):
+                if line.startswith(" ") and records:
+                    records[-1] += "\n" + line
+                else:
+                    records.append(line)
+            records.reverse()
+            return "\n".join(records)
 
         @callback(
             Output(view_comp_id(TimeSeriesPlot.Ids.LOG), "id"),
@@ -290,68 +874,144 @@ class TimeSeriesView(ViewABC):
             return no_update
 
 
+def _replace_case_traces(
+    figure: Patch, trace_counts: List[Optional[int]], idx: int, traces: List[dict]
+) -> None:
+    """Delete the previous traces of a case and insert the new ones at the same
+    position, leaving the other cases untouched. Cases still loading (None in
+    `trace_counts`) have no traces."""
+    start = sum(count or 0 for count in trace_counts[:idx])
+    for trace_idx in reversed(range(start, start + (trace_counts[idx] or 0))):
+        del figure["data"][trace_idx]
+    for offset, trace in enumerate(traces):
+        figure["data"].insert(start + offset, trace)
+    trace_counts[idx] = len(traces)
+
+
+def _derived_key(scope, case: str, iteration: str, derived: DerivedVector) -> Tuple:
+    return (scope, "derived", case, iteration, derived.name)
+
+
+def _progress_text(pending_cases: List[str]) -> str:
+    return f"Loading case {', '.join(pending_cases)}" if pending_cases else ""
+
+
 def plotly_realization_traces_for_vector(
-    df: pd.DataFrame, case_name: str, iteration_id: str, vector_name: str, color: str
-):
+    table: pa.Table, case_name: str, iteration_id: str, vector_name: str, color: str
+) -> List[dict]:
 
     name = f"{case_name}-{iteration_id}-{vector_name}"
+    table = table.take(
+        pc.sort_indices(table, sort_keys=[("REAL", "ascending"), ("DATE", "ascending")])
+    )
+    reals = table.column("REAL").to_numpy()
+    dates = table.column("DATE").to_numpy()
+    values = table.column(vector_name).to_numpy(zero_copy_only=False)
+
+    # Split the sorted columns into one slice per realization
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(reals)) + 1, [len(reals)]))
     return [
-        go.Scatter(
-            x=real_df["DATE"],
-            y=real_df[vector_name],
-            mode="lines",
-            name=name,
-            line={"color": color},
-            legendgroup=name,
-            hovertemplate=f"Realization: {real}",
-            showlegend=idx == 0,
-        )
-        for idx, (real, real_df) in enumerate(df.groupby("REAL"))
+        {
+            "type": "scatter",
+            "x": date_typed_array(dates[start:end]),
+            "y": typed_array(values[start:end]),
+            "mode": "lines",
+            "name": name,
+            "line": {"color": color},
+            "legendgroup": name,
+            "hovertemplate": f"Realization: {reals[start]}",
+            "showlegend": idx == 0,
+        }
+        for idx, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
     ]
 
 
+def with_modes(traces: List[dict], modes: List[str], mode: str) -> List[dict]:
+    """Tag traces with the modes ("realization", "aggregation") they are shown
+    in, and show them if `mode` is one of them"""
+    for trace in traces:
+        trace["meta"] = {"modes": modes}
+        trace["visible"] = mode in modes
+    return traces
+
+
 def calc_series_statistics(
-    df: pd.DataFrame, vector_name: str, refaxis: str = "DATE"
-) -> pd.DataFrame:
+    table: pa.Table, vector_name: str, refaxis: str = "DATE"
+) -> pa.Table:
 
-    # Invert p10 and p90 due to oil industry convention.
-    def p10(x: List[float]) -> np.floating:
-        return np.nanpercentile(x, q=90)
-
-    def p90(x: List[float]) -> np.floating:
-        return np.nanpercentile(x, q=10)
-
-    # Calculate statistics, ignoring NaNs.
-    stat_df = (
-        df[[refaxis, vector_name]]
-        .groupby(refaxis)
-        .agg([np.nanmean, np.nanmin, np.nanmax, p10, p90])
-        .reset_index()  # level=["label", refaxis], col_level=0)
+    # Drop nulls and NaNs up front, the statistics then ignore them.
+    values = table.column(vector_name)
+    valid = pc.fill_null(pc.invert(pc.is_nan(values)), False)
+    table = table.select([refaxis, vector_name]).filter(valid)
+
+    stat_table = (
+        table.group_by(refaxis)
+        .aggregate(
+            [
+                (vector_name, "mean"),
+                (vector_name, "min"),
+                (vector_name, "max"),
+                (vector_name, "count"),
+            ]
+        )
+        .sort_by(refaxis)
     )
-    # Rename nanmin, nanmax and nanmean to min, max and mean.
-    col_stat_label_map = {
-        "nanmin": "min",
-        "nanmax": "max",
-        "nanmean": "mean",
-        "p10": "high_p10",
-        "p90": "low_p90",
-    }
-    stat_df.rename(columns=col_stat_label_map, level=1, inplace=True)
 
-    return stat_df
+    # Exact percentiles with linear interpolation (as numpy.nanpercentile), by
+    # sorting on (refaxis, value) and indexing into each refaxis group.
+    sorted_values = table.take(
+        pc.sort_indices(
+            table, sort_keys=[(refaxis, "ascending"), (vector_name, "ascending")]
+        )
+    ).column(vector_name)
+    counts = stat_table.column(f"{vector_name}_count")
+    starts = pc.subtract(pc.cumulative_sum(counts), counts)
+
+    def percentile(q: float) -> pa.Array:
+        pos = pc.add(starts, pc.multiply(pc.subtract(counts, 1), q))
+        lower = pc.cast(pc.floor(pos), pa.int64())
+        upper = pc.cast(pc.ceil(pos), pa.int64())
+        lower_values = pc.take(sorted_values, lower)
+        upper_values = pc.take(sorted_values, upper)
+        return pc.add(
+            lower_values,
+            pc.multiply(
+                pc.subtract(upper_values, lower_values), pc.subtract(pos, lower)
+            ),
+        )
+
+    # Invert p10 and p90 due to oil industry convention.
+    return pa.table(
+        {
+            refaxis: stat_table.column(refaxis),
+            "mean": stat_table.column(f"{vector_name}_mean"),
+            "min": stat_table.column(f"{vector_name}_min"),
+            "max": stat_table.column(f"{vector_name}_max"),
+            "high_p10": percentile(0.9),
+            "p50": percentile(0.5),
+            "low_p90": percentile(0.1),
+        }
+    )
 
 
 def plotly_aggregation_traces_for_vector(
-    df: pd.DataFrame, case_name: str, iteration_id: str, vector_name: str, color: str
+    table: pa.Table,
+    case_name: str,
+    iteration_id: str,
+    vector_name: str,
+    color: str,
+    stat_table: Optional[pa.Table] = None,
 ) -> dict:
     case_name = f"{case_name}-{iteration_id}"
 
-    stat_df = calc_series_statistics(df, vector_name)
+    if stat_table is None:
+        stat_table = calc_series_statistics(table, vector_name)
+    dates = date_typed_array(stat_table.column("DATE").to_numpy())
     traces = [
         {
             "line": {"dash": "dot", "width": 3},
-            "x": stat_df["DATE"],
-            "y": stat_df[(vector_name, "max")],
+            "x": dates,
+            "y": typed_array(stat_table.column("max").to_numpy()),
             "hovertemplate": f"Calculation: {'max'},Case: {case_name}",
             "name": case_name,
             "legendgroup": case_name,
@@ -361,8 +1021,8 @@ def plotly_aggregation_traces_for_vector(
         },
         {
             "line": {"dash": "dash"},
-            "x": stat_df["DATE"],
-            "y": stat_df[(vector_name, "high_p10")],
+            "x": dates,
+            "y": typed_array(stat_table.column("high_p10").to_numpy()),
             "hovertemplate": f"Calculation: {'high_p10'},Case: {case_name}",
             "name": case_name,
             "legendgroup": case_name,
@@ -371,8 +1031,8 @@ def plotly_aggregation_traces_for_vector(
             "mode": "lines",
         },
         {
-            "x": stat_df["DATE"],
-            "y": stat_df[(vector_name, "mean")],
+            "x": dates,
+            "y": typed_array(stat_table.column("mean").to_numpy()),
             "hovertemplate": f"Calculation: {'mean'}, Case: {case_name}",
             "name": case_name,
             "legendgroup": case_name,
@@ -383,8 +1043,8 @@ def plotly_aggregation_traces_for_vector(
         },
         {
             "line": {"dash": "dash"},
-            "x": stat_df["DATE"],
-            "y": stat_df[(vector_name, "low_p90")],
+            "x": dates,
+            "y": typed_array(stat_table.column("low_p90").to_numpy()),
             "hovertemplate": f"Calculation: {'low_p90'}, Case: {case_name}",
             "name": case_name,
             "legendgroup": case_name,
@@ -395,8 +1055,8 @@ def plotly_aggregation_traces_for_vector(
         },
         {
             "line": {"dash": "dot", "width": 1},
-            "x": stat_df["DATE"],
-            "y": stat_df[(vector_name, "min")],
+            "x": dates,
+            "y": typed_array(stat_table.column("min").to_numpy()),
             "hovertemplate": f"Calculation: {'min'}, Case: {case_name}",
             "name": case_name,
             "legendgroup": case_name,
@@ -1,60 +1,51 @@
 from io import BytesIO
+import logging
+from typing import Callable, List, Optional
 
 from fmu.sumo.explorer import Explorer
 import pandas as pd
+import pyarrow as pa
 import time
 
+from webviz_sumo_experiments.utils.background_jobs import report_progress
+from webviz_sumo_experiments.utils.case_access import case_scope
+from webviz_sumo_experiments.utils.cancellation import check_cancelled
+from webviz_sumo_experiments.utils.memory_budget import MEMORY_BUDGET, SpillWriter
+from webviz_sumo_experiments.utils.search_cache import QueryType
+from webviz_sumo_experiments.utils.sumo_query import build_query
+from webviz_sumo_experiments.utils.sumo_search import blob_size, iter_hits
+from webviz_sumo_experiments.utils.sumo_transport import sumo_get
 
-def get_case_uuids_with_volumetrics(explorer: Explorer, field_id):
-    hits = explorer.sumo.get(
-        "/search",
-        query=f"class:table AND  \
-                data.content:volumes AND \
-                masterdata.smda.field.identifier:{field_id} AND \
-                fmu.realization.id:0 AND \
-                fmu.iteration.id:0",
-        select="_sumo.parent_object",
-        size=1000,
-    )["hits"]["hits"]
-    if not hits:
-        return []
-    return list(set([hit["_source"]["_sumo"]["parent_object"] for hit in hits]))
+from .volumetric_index import SELECTORS
+
+LOGGER = logging.getLogger(__name__)
+
+# A CSV table takes roughly this many times its size in memory while it is
+# parsed, concatenated and converted to Arrow
+CSV_MEMORY_FACTOR = 4
+# Number of partial tables passed to `on_partial` while loading an ensemble
+PARTIAL_UPDATES = 10
 
 
 def get_volumetrics_names_for_case_uuid(explorer: Explorer, case_uuid, iteration_id=0):
-    hits = explorer.sumo.get(
-        "/search",
-        query=f"_sumo.parent_object:{case_uuid} AND \
-                  class:table AND \
-                  data.content:volumes AND \
-                  fmu.realization.id:0 AND \
-                  fmu.iteration.id:{iteration_id}",
+    hits = iter_hits(
+        explorer,
+        query=build_query(
+            {
+                "_sumo.parent_object": case_uuid,
+                "class": "table",
+                "data.content": "volumes",
+                "fmu.realization.id": 0,
+                "fmu.iteration.id": iteration_id,
+            }
+        ),
         select="data.name",
-    )["hits"]["hits"]
-    if not hits:
-        return []
+        query_type=QueryType.VOLUMETRIC_NAMES,
+        cache_scope=case_scope(explorer, case_uuid),
+    )
     return [hit["_source"]["data"]["name"] for hit in hits]
 
 
-def get_realizations_for_volumetric_name(
-    explorer: Explorer, case_uuid, iteration_id, volumetric_name
-):
-
-    hits = explorer.sumo.get(
-        "/search",
-        query=f"_sumo.parent_object:{case_uuid} AND \
-                class:table AND  \
-                data.content:volumes AND \
-                data.name:{volumetric_name} AND \
-                fmu.iteration.id:{iteration_id}",
-        select="fmu.realization.id",
-        size=10000,
-    )["hits"]["hits"]
-    if not hits:
-        return []
-    return [hit["_source"]["fmu"]["realization"]["id"] for hit in hits]
-
-
 def get_realization_volumetrics(
     explorer: Explorer,
     case_uuid: str,
@@ -63,48 +54,118 @@ def get_realization_volumetrics(
     realization_id: str = 0,
 ):
 
-    hits = explorer.sumo.get(
+    hits = sumo_get(
+        explorer,
         "/search",
-        query=f"_sumo.parent_object:{case_uuid} AND \
-              class:table AND \
-              data.content:volumes AND \
-              data.name:{volumetric_name} AND \
-              fmu.iteration.id:{iteration_id} AND \
-              fmu.realization.id:{realization_id}",
+        query=build_query(
+            {
+                "_sumo.parent_object": case_uuid,
+                "class": "table",
+                "data.content": "volumes",
+                "data.name": volumetric_name,
+                "fmu.iteration.id": iteration_id,
+                "fmu.realization.id": realization_id,
+            }
+        ),
         size=1,
         select=False,
     )["hits"]["hits"]
     if not hits:
         return None
     obj_uuid = hits[0]["_id"]
-    return pd.read_csv(BytesIO(explorer.sumo.get(f"/objects('{obj_uuid}')/blob")))
+    return pd.read_csv(BytesIO(sumo_get(explorer, f"/objects('{obj_uuid}')/blob")))
 
 
-def get_ensemble_volumetrics(
+def _get_ensemble_volumetrics_hits(
     explorer: Explorer, case_uuid: str, iteration_id: str, volumetric_name: str
-):
-    reals = get_realizations_for_volumetric_name(
+) -> List[dict]:
+    # One paged search lists the tables of all realizations
+    return list(
+        iter_hits(
+            explorer,
+            query=build_query(
+                {
+                    "_sumo.parent_object": case_uuid,
+                    "class": "table",
+                    "data.content": "volumes",
+                    "data.name": volumetric_name,
+                    "fmu.iteration.id": iteration_id,
+                }
+            ),
+            select=["fmu.realization.id", "_sumo.blob_size"],
+        )
+    )
+
+
+def _read_realization_volumetrics(explorer: Explorer, hit: dict) -> pd.DataFrame:
+    obj_uuid = hit["_id"]
+    content = sumo_get(explorer, f"/objects('{obj_uuid}')/blob")
+    check_cancelled()
+    df = pd.read_csv(BytesIO(content))
+    df["REAL"] = hit["_source"]["fmu"]["realization"]["id"]
+    return df
+
+
+def get_ensemble_volumetrics_table(
+    explorer: Explorer,
+    case_uuid: str,
+    iteration_id: str,
+    volumetric_name: str,
+    on_partial: Optional[Callable[[pa.Table], None]] = None,
+) -> Optional[pa.Table]:
+    """Get the volumetric table of all realizations. If the estimated size of
+    the tables is over the memory budget, the realizations are converted one
+    at a time and spilled to disk, and the returned table is memory mapped.
+
+    Progress is reported per realization when run as a background job. If
+    given, `on_partial` is called PARTIAL_UPDATES times with the table of the
+    realizations loaded so far (not when spilling)."""
+    hits = _get_ensemble_volumetrics_hits(
         explorer, case_uuid, iteration_id, volumetric_name
     )
-    dfs = []
-    for real in reals:
-        hits = explorer.sumo.get(
-            "/search",
-            query=f"_sumo.parent_object:{case_uuid} AND \
-              class:table AND \
-              data.content:volumes AND \
-              data.name:{volumetric_name} AND \
-              fmu.iteration.id:{iteration_id} AND \
-              fmu.realization.id:{real}",
-            size=1,
-            select=False,
-        )["hits"]["hits"]
-        if not hits:
-            continue
-        obj_uuid = hits[0]["_id"]
-        df = pd.read_csv(BytesIO(explorer.sumo.get(f"/objects('{obj_uuid}')/blob")))
-        df["REAL"] = real
-        dfs.append(df)
-    if not dfs:
-        return None
-    return pd.concat(dfs)
+    report_progress(0, len(hits))
+    estimated_bytes = CSV_MEMORY_FACTOR * sum(blob_size(hit) for hit in hits)
+    with MEMORY_BUDGET.reserve(estimated_bytes) as in_memory:
+        if in_memory:
+            dfs = []
+            partial_every = max(1, len(hits) // PARTIAL_UPDATES)
+            for hit in hits:
+                dfs.append(_read_realization_volumetrics(explorer, hit))
+                report_progress(len(dfs), len(hits))
+                if (
+                    on_partial is not None
+                    and len(dfs) % partial_every == 0
+                    and len(dfs) < len(hits)
+                ):
+                    on_partial(
+                        _float_responses(
+                            pa.Table.from_pandas(pd.concat(dfs), preserve_index=False)
+                        )
+                    )
+            if not dfs:
+                return None
+            return _float_responses(
+                pa.Table.from_pandas(pd.concat(dfs), preserve_index=False)
+            )
+
+        LOGGER.info(f"Spilling volumetrics {volumetric_name} to disk")
+        with SpillWriter() as writer:
+            for done, hit in enumerate(hits, start=1):
+                df = _read_realization_volumetrics(explorer, hit)
+                report_progress(done, len(hits))
+                writer.write(
+                    _float_responses(pa.Table.from_pandas(df, preserve_index=False))
+                )
+            return writer.read()
+
+
+def _float_responses(table: pa.Table) -> pa.Table:
+    """Cast integer response columns to float, so the realizations spilled
+    one by one share a schema also when some have integer volumes, and loads
+    give the same column types whether they spilled or not"""
+    for idx, field in enumerate(table.schema):
+        if field.name not in SELECTORS + ["REAL"] and pa.types.is_integer(field.type):
+            table = table.set_column(
+                idx, field.name, table.column(idx).cast(pa.float64())
+            )
+    return table
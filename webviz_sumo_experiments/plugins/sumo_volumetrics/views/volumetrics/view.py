@@ -1,34 +1,79 @@
+from collections import defaultdict
+from functools import partial
 from io import StringIO
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-import flask
 from dash.development.base_component import Component
-from dash import html, dcc, callback, Input, Output, no_update, State, MATCH, ALL
-import numpy as np
-import pandas as pd
+from dash import (
+    html,
+    dcc,
+    dash_table,
+    callback,
+    clientside_callback,
+    ctx,
+    Input,
+    Output,
+    no_update,
+    State,
+    MATCH,
+    ALL,
+    Patch,
+)
+import pyarrow as pa
 import webviz_core_components as wcc
-import plotly.graph_objects as go
-import plotly.express as px
+from plotly.subplots import make_subplots
 from fmu.sumo.explorer import Explorer
 from ...sumo_requests import (
     get_volumetrics_names_for_case_uuid,
-    get_ensemble_volumetrics,
+    get_ensemble_volumetrics_table,
     get_realization_volumetrics,
 )
 from webviz_config.utils import StrEnum
 from webviz_config.webviz_plugin_subclasses import ViewABC, ViewElementABC
 from webviz_sumo_experiments import PerfTimer
+from webviz_sumo_experiments.utils.background_jobs import (
+    BACKGROUND_JOBS,
+    JobState,
+    JobStatus,
+)
+from webviz_sumo_experiments.utils.callback_profiler import profiled_callback
+from webviz_sumo_experiments.utils.cancellation import (
+    PAGE_ID_JS,
+    cancellable_callback,
+    check_cancelled,
+)
+from webviz_sumo_experiments.utils.callback_trace import traced_callback
+from webviz_sumo_experiments.utils.callback_utils import (
+    triggered_case,
+    case_keys_for_input,
+    case_color,
+)
+from webviz_sumo_experiments.utils.figure_encoding import typed_array
+from webviz_sumo_experiments.utils.case_access import case_scope
+from webviz_sumo_experiments.plugins.shared_settings.case_settings import CaseSettings
+from webviz_sumo_experiments.utils.shared_table_store import SharedTableStore
+from webviz_sumo_experiments.utils.sumo_provider import SumoDataProvider, SumoDataType
+from ...volumetric_index import (
+    STATISTICS,
+    VolumetricIndex,
+    get_volumetric_index,
+)
 from .volumetric_settings import VolumetricsSettings
-from .case_settings import CaseSettings
 
 
 class VolumetricsPlot(ViewElementABC):
     class Ids(StrEnum):
         GRAPH = "graph"
+        STATISTICS = "statistics"
+        PROGRESS = "progress"
+        JOB_POLL = "job-poll"
+        CASE_COUNT = "case-count"
+        LOADED = "loaded"
         INTERVAL = "interval"
         LOG = "log"
         CLEARLOG = "clearlog"
+        PAGE_ID = "page-id"
 
     def __init__(self) -> None:
         super().__init__(flex_grow=8)
@@ -45,6 +90,55 @@ class VolumetricsPlot(ViewElementABC):
                         },
                     ),
                 ),
+                # Random id of the page, see cancellable_callback
+                dcc.Store(
+                    id=self.register_component_unique_id(VolumetricsPlot.Ids.PAGE_ID)
+                ),
+                # Number of cases (subplots) of the drawn figure
+                dcc.Store(
+                    id=self.register_component_unique_id(VolumetricsPlot.Ids.CASE_COUNT)
+                ),
+                # Set when the background loads the job poll waited for are done
+                dcc.Store(
+                    id=self.register_component_unique_id(VolumetricsPlot.Ids.LOADED)
+                ),
+                html.Div(
+                    id=self.register_component_unique_id(VolumetricsPlot.Ids.PROGRESS)
+                ),
+                # Polls the background jobs loading ensembles, while any runs
+                dcc.Interval(
+                    id=self.register_component_unique_id(VolumetricsPlot.Ids.JOB_POLL),
+                    interval=1000,
+                    n_intervals=0,
+                    disabled=True,
+                ),
+                dash_table.DataTable(
+                    id=self.register_component_unique_id(
+                        VolumetricsPlot.Ids.STATISTICS
+                    ),
+                    columns=[
+                        {"id": "case", "name": "Case"},
+                        {"id": "iteration", "name": "Iteration"},
+                        {"id": "volname", "name": "Table"},
+                        {"id": "response", "name": "Response"},
+                    ]
+                    + [
+                        {
+                            "id": stat,
+                            "name": (
+                                stat.upper()
+                                if stat.startswith("p")
+                                else stat.capitalize()
+                            ),
+                            "type": "numeric",
+                            "format": {"specifier": ".4~s"},
+                        }
+                        for stat in STATISTICS
+                    ],
+                    sort_action="native",
+                    filter_action="native",
+                    page_size=20,
+                ),
                 dcc.Interval(
                     id=self.register_component_unique_id(VolumetricsPlot.Ids.INTERVAL),
                     interval=1000,
@@ -70,9 +164,9 @@ class VolumetricsView(ViewABC):
 
     def __init__(
         self,
-        env: str,
+        provider: SumoDataProvider,
         initial_case_name: str,
-        interactive: bool,
+        number_of_cases: int = 2,
     ) -> None:
         super().__init__("Vol")
         logFormatter = logging.Formatter(
@@ -87,20 +181,169 @@ class VolumetricsView(ViewABC):
         self.logger.addHandler(stream_handler)
         self.add_settings_group(
             CaseSettings(
-                env=env,
+                provider=provider,
+                data_type=SumoDataType.VOLUMES,
                 initial_case_name=initial_case_name,
-                interactive=interactive,
                 logger=self.logger,
+                owner="SumoVolumetrics",
+                number_of_cases=number_of_cases,
+                prefetch=self._prefetch_initial_case,
             ),
             VolumetricsView.Ids.CASESETTINGS,
         )
-        self.add_settings_group(VolumetricsSettings(), VolumetricsView.Ids.VOLSETTINGS)
+        self.add_settings_group(
+            VolumetricsSettings(number_of_cases=number_of_cases),
+            VolumetricsView.Ids.VOLSETTINGS,
+        )
         self.add_view_element(VolumetricsPlot(), VolumetricsView.Ids.PLOT)
         self.initial_case_name = initial_case_name
-        self.env = env
-        self.interactive = interactive
+        self.provider = provider
         self.set_callbacks()
 
+    def _prefetch_initial_case(
+        self, explorer: Explorer, case: str, iteration: str
+    ) -> None:
+        """Start loading the first volumetric table of the initial case, which
+        the figure asks for once the name and response dropdowns are set"""
+        volnames = get_volumetrics_names_for_case_uuid(
+            explorer, case_uuid=case, iteration_id=iteration
+        )
+        if volnames:
+            self._case_index(explorer, case, iteration, volnames[0])
+
+    def _case_index(
+        self, explorer: Explorer, case: str, iteration: str, volname: str
+    ) -> Tuple[Optional[VolumetricIndex], Optional[JobState]]:
+        """Get the index of the ensemble volumetrics of a case if the table is
+        loaded, otherwise start (or follow) the background job loading it.
+
+        Returns the index and None when loaded. While loading, returns the
+        index of the realizations loaded so far (None before the first partial
+        table) and the state of the job. Both are None if the case has no data.
+        """
+        # Decoded tables are shared with the other worker processes, and
+        # between all users with access to the case. The group index of a
+        # table is kept in memory, so filter changes do not touch the table.
+        scope = case_scope(explorer, case)
+        table_key = (scope, "volumetrics", case, iteration, volname)
+        vol_index = get_volumetric_index(
+            table_key, partial(self.provider.table_store.get, table_key)
+        )
+        if vol_index is not None:
+            return vol_index, None
+
+        state = BACKGROUND_JOBS.state(table_key)
+        if state is not None and state.status == JobStatus.DONE:
+            if not state.has_result:
+                return None, None
+            # The table has been evicted from the store since it was loaded
+            BACKGROUND_JOBS.forget(table_key)
+        state = BACKGROUND_JOBS.start(
+            table_key,
+            _load_volumetric_index,
+            table_key,
+            table_store=self.provider.table_store,
+            explorer=explorer,
+            case=case,
+            iteration=iteration,
+            volname=volname,
+        )
+        if state.status == JobStatus.FAILED:
+            self.logger.info(f"Failed to load volumetrics {volname}: {state.error}")
+            return None, None
+        partial_table = self.provider.table_store.get(_partial_key(table_key))
+        if partial_table is None:
+            return None, state
+        return VolumetricIndex(partial_table), state
+
+    def _histograms_for_cases(
+        self,
+        explorer: Explorer,
+        selections: Dict[int, Tuple[str, str, str, str, Dict[str, Sequence[Any]]]],
+    ) -> Tuple[Dict[int, Tuple[dict, str]], List[str]]:
+        """Build a histogram trace and subplot title per case index for the
+        selected (case, iteration, volname, volresponse, filters), starting
+        background loads for ensembles not loaded yet. Cases still loading show
+        the realizations loaded so far. Also returns the progress of the loads
+        still running."""
+        histograms: Dict[int, Tuple[dict, str]] = {}
+        progress: List[str] = []
+        for idx, (case, iteration, volname, volresponse, filters) in selections.items():
+            trace = _histogram_trace(subplot_idx=idx)
+            if None in (case, iteration, volname, volresponse):
+                histograms[idx] = (trace, _NO_TITLE)
+                continue
+            vol_index, job_state = self._case_index(explorer, case, iteration, volname)
+            check_cancelled()
+            title = f"{self.provider.case_name(explorer, case)}-{iteration}-{volname}"
+            if job_state is not None:
+                progress.append(_job_progress_text(title, job_state))
+            if vol_index is not None:
+                trace["x"] = typed_array(
+                    vol_index.realization_sums(volresponse, filters)
+                )
+                title = f"{title}-{volresponse}"
+            if job_state is not None:
+                title = f"{title} ({job_state.progress_text(unit='realizations')})"
+            elif vol_index is None:
+                title = _NO_TITLE
+            histograms[idx] = (trace, title)
+        return histograms, progress
+
+    def _loading_progress(
+        self, explorer: Explorer, selections: List[Tuple[str, str, str]]
+    ) -> List[str]:
+        """Get the progress of the background loads still running for the
+        selected (case, iteration, volname) of each case"""
+        progress = []
+        for case, iteration, volname in selections:
+            if None in (case, iteration, volname):
+                continue
+            _, job_state = self._case_index(explorer, case, iteration, volname)
+            if job_state is not None:
+                name = (
+                    f"{self.provider.case_name(explorer, case)}-{iteration}-{volname}"
+                )
+                progress.append(_job_progress_text(name, job_state))
+        return progress
+
+    def _statistics_rows(
+        self,
+        explorer: Explorer,
+        case_keys: List[str],
+        selections: List[Tuple[str, str, str, Dict[str, Sequence[Any]]]],
+    ) -> Optional[List[dict]]:
+        """Get statistics table rows for all responses of the selected (case,
+        iteration, volname, filters) of each case, None while an ensemble is
+        still loading"""
+        indexes = {}
+        for idx, (case, iteration, volname, _) in enumerate(selections):
+            if None in (case, iteration, volname):
+                continue
+            vol_index, job_state = self._case_index(explorer, case, iteration, volname)
+            if job_state is not None:
+                return None
+            if vol_index is not None:
+                indexes[idx] = vol_index
+
+        rows = []
+        for idx, vol_index in indexes.items():
+            check_cancelled()
+            case, iteration, volname, filters = selections[idx]
+            stats = vol_index.statistics(filters)
+            for response_idx, response in enumerate(vol_index.responses):
+                row = {
+                    "case": f"{case_keys[idx]}: {self.provider.case_name(explorer, case)}",
+                    "iteration": iteration,
+                    "volname": volname,
+                    "response": response,
+                }
+                row.update(
+                    {stat: float(stats[stat][response_idx]) for stat in STATISTICS}
+                )
+                rows.append(row)
+        return rows
+
     def set_callbacks(self) -> None:
         def case_settings_id(**kwargs):
             comp_id = {
@@ -119,6 +362,12 @@ class VolumetricsView(ViewABC):
         def view_comp_id(comp: str):
             return self.view_elements()[0].component_unique_id(comp).to_string()
 
+        clientside_callback(
+            PAGE_ID_JS,
+            Output(view_comp_id(VolumetricsPlot.Ids.PAGE_ID), "data"),
+            Input(view_comp_id(VolumetricsPlot.Ids.PAGE_ID), "id"),
+        )
+
         @callback(
             Output(
                 vol_settings_id(case=MATCH, comp="name"),
@@ -140,16 +389,14 @@ class VolumetricsView(ViewABC):
                 vol_settings_id(case=MATCH, comp="name"),
                 "value",
             ),
+            State(view_comp_id(VolumetricsPlot.Ids.PAGE_ID), "data"),
         )
-        def _get_vol_names(case, iteration, current_volname):
+        @traced_callback(self.logger)
+        @profiled_callback("SumoVolumetrics.VolumetricsView")
+        @cancellable_callback(self.logger, view_comp_id(VolumetricsPlot.Ids.PAGE_ID))
+        def _get_vol_names(case, iteration, current_volname, _page_id):
 
-            if self.interactive:
-                explorer = Explorer(env=self.env, interactive=self.interactive)
-            else:
-                explorer = Explorer(
-                    env=self.env,
-                    token=flask.request.headers["X-Auth-Request-Access-Token"],
-                )
+            explorer = self.provider.explorer()
             timer = PerfTimer()
             volnames = get_volumetrics_names_for_case_uuid(
                 explorer, case_uuid=case, iteration_id=iteration
@@ -173,6 +420,14 @@ class VolumetricsView(ViewABC):
                 vol_settings_id(case=MATCH, comp="response"),
                 "value",
             ),
+            Output(
+                vol_settings_id(case=MATCH, comp="filter", selector=ALL),
+                "options",
+            ),
+            Output(
+                vol_settings_id(case=MATCH, comp="filter", selector=ALL),
+                "value",
+            ),
             Input(
                 case_settings_id(case=MATCH, comp="case"),
                 "value",
@@ -189,21 +444,25 @@ class VolumetricsView(ViewABC):
                 vol_settings_id(case=MATCH, comp="response"),
                 "value",
             ),
+            State(
+                vol_settings_id(case=MATCH, comp="filter", selector=ALL),
+                "value",
+            ),
+            State(view_comp_id(VolumetricsPlot.Ids.PAGE_ID), "data"),
         )
+        @traced_callback(self.logger)
+        @profiled_callback("SumoVolumetrics.VolumetricsView")
+        @cancellable_callback(self.logger, view_comp_id(VolumetricsPlot.Ids.PAGE_ID))
         def _get_vol_responses(
             case,
             iteration,
             volname,
             current_volresponse,
+            current_filters,
+            _page_id,
         ):
 
-            if self.interactive:
-                explorer = Explorer(env=self.env, interactive=self.interactive)
-            else:
-                explorer = Explorer(
-                    env=self.env,
-                    token=flask.request.headers["X-Auth-Request-Access-Token"],
-                )
+            explorer = self.provider.explorer()
             timer = PerfTimer()
             vol_df = get_realization_volumetrics(
                 explorer=explorer,
@@ -212,23 +471,46 @@ class VolumetricsView(ViewABC):
                 volumetric_name=volname,
             )
             self.logger.info(f"get_available_responses: {timer.lap_s()}")
+            selectors = [output["id"]["selector"] for output in ctx.outputs_list[2]]
             if vol_df is None:
-                return [], None
-            responses = [
-                col
-                for col in vol_df.columns
-                if col not in ["ZONE", "REGION", "LICENSE", "FACIES", "REAL"]
-            ]
+                return [], None, [[]] * len(selectors), [[]] * len(selectors)
+            # Responses and filter values are taken from the first
+            # realization, so the dropdowns do not wait for the full ensemble.
+            real_index = VolumetricIndex(
+                pa.Table.from_pandas(vol_df.assign(REAL=0), preserve_index=False)
+            )
+            responses = real_index.responses
+
+            filter_opts = []
+            filter_vals = []
+            for selector, current_values in zip(selectors, current_filters):
+                values = real_index.selector_values(selector)
+                filter_opts.append(
+                    [{"label": str(val), "value": val} for val in values]
+                )
+                filter_vals.append(
+                    [val for val in current_values or [] if val in values]
+                )
+
             if current_volresponse in responses:
                 response = current_volresponse
             elif "STOIIP_OIL" in responses:
                 response = "STOIIP_OIL"
             else:
-                response = responses[0]
-            return [{"label": resp, "value": resp} for resp in responses], response
+                response = responses[0] if responses else None
+            return (
+                [{"label": resp, "value": resp} for resp in responses],
+                response,
+                filter_opts,
+                filter_vals,
+            )
 
         @callback(
             Output(view_comp_id(VolumetricsPlot.Ids.GRAPH), "figure"),
+            Output(view_comp_id(VolumetricsPlot.Ids.PROGRESS), "children"),
+            Output(view_comp_id(VolumetricsPlot.Ids.JOB_POLL), "disabled"),
+            Output(view_comp_id(VolumetricsPlot.Ids.CASE_COUNT), "data"),
+            Output(view_comp_id(VolumetricsPlot.Ids.LOADED), "data"),
             Input(
                 case_settings_id(case=ALL, comp="case"),
                 "value",
@@ -245,56 +527,152 @@ class VolumetricsView(ViewABC):
                 vol_settings_id(case=ALL, comp="response"),
                 "value",
             ),
+            Input(
+                vol_settings_id(case=ALL, comp="filter", selector=ALL),
+                "value",
+            ),
+            Input(view_comp_id(VolumetricsPlot.Ids.JOB_POLL), "n_intervals"),
+            State(view_comp_id(VolumetricsPlot.Ids.CASE_COUNT), "data"),
+            State(view_comp_id(VolumetricsPlot.Ids.PAGE_ID), "data"),
         )
-        def _get_vectors(
+        @traced_callback(self.logger)
+        @profiled_callback("SumoVolumetrics.VolumetricsView")
+        @cancellable_callback(self.logger, view_comp_id(VolumetricsPlot.Ids.PAGE_ID))
+        def _update_figure(
             cases,
             iterations,
             volnames,
             volresponses,
+            _filter_values,
+            _n_polls,
+            case_count,
+            _page_id,
         ):
-            if self.interactive:
-                explorer = Explorer(env=self.env, interactive=self.interactive)
-            else:
-                explorer = Explorer(
-                    env=self.env,
-                    token=flask.request.headers["X-Auth-Request-Access-Token"],
-                )
+            explorer = self.provider.explorer()
             if not cases or not iterations or not volnames or not volresponses:
-                return no_update
+                return no_update, no_update, no_update, no_update, no_update
             timer = PerfTimer()
-            dfs = []
-            self.logger.info(f"Getting volumetrics per realization...")
-            for case, iteration, volname, volresponse in zip(
-                cases, iterations, volnames, volresponses
-            ):
-                vol_df = get_ensemble_volumetrics(
-                    explorer=explorer,
-                    case_uuid=case,
-                    iteration_id=iteration,
-                    volumetric_name=volname,
+            self.logger.info("Getting volumetrics per realization...")
+
+            # Each case owns exactly one trace and one subplot title, so a change
+            # in a single case only replaces that trace and title.
+            filters = _filters_for_cases(case_keys_for_input(), filter_input_idx=4)
+            changed_case = triggered_case()
+            if changed_case is not None and case_count == len(cases):
+                idx = case_keys_for_input().index(changed_case)
+                histograms, _ = self._histograms_for_cases(
+                    explorer,
+                    {
+                        idx: (
+                            cases[idx],
+                            iterations[idx],
+                            volnames[idx],
+                            volresponses[idx],
+                            filters[idx],
+                        )
+                    },
                 )
-                case_name = explorer.get_case_by_id(case).case_name
-                vol_df["value"] = vol_df[volresponse]
-                vol_df = vol_df.groupby("REAL").sum(numeric_only=True)
-                vol_df[
-                    "response_name"
-                ] = f"{case_name}-{iteration}-{volname}-{volresponse}"
-                dfs.append(vol_df)
+                self.logger.info(f"Volumetrics for all realizations: {timer.lap_s()}")
+                trace, title = histograms[idx]
+                # The other cases may still be loading, and are polled for
+                progress = self._loading_progress(
+                    explorer, list(zip(cases, iterations, volnames))
+                )
+                patched_figure = Patch()
+                patched_figure["data"][idx] = trace
+                patched_figure["layout"]["annotations"][idx]["text"] = title
+                return (
+                    patched_figure,
+                    _progress_text(progress),
+                    not progress,
+                    no_update,
+                    no_update,
+                )
+
+            # Also redraws when polled, until all background loads are done
+            histograms, progress = self._histograms_for_cases(
+                explorer,
+                dict(
+                    enumerate(zip(cases, iterations, volnames, volresponses, filters))
+                ),
+            )
             self.logger.info(f"Volumetrics for all realizations: {timer.lap_s()}")
-            df = pd.concat(dfs)
+            fig = make_subplots(
+                rows=1,
+                cols=len(cases),
+                subplot_titles=[histograms[idx][1] for idx in range(len(cases))],
+            )
+            fig.add_traces([histograms[idx][0] for idx in range(len(cases))])
+            fig.update_layout(showlegend=False)
+            # Any update of the store triggers the statistics, so it is only
+            # set by the poll that finds the loads done
+            polled = ctx.triggered_id == view_comp_id(VolumetricsPlot.Ids.JOB_POLL)
+            return (
+                fig,
+                _progress_text(progress),
+                not progress,
+                len(cases),
+                _n_polls if polled and not progress else no_update,
+            )
 
-            return px.histogram(df, x="value", nbins=20, facet_col="response_name")
+        @callback(
+            Output(view_comp_id(VolumetricsPlot.Ids.STATISTICS), "data"),
+            Input(
+                case_settings_id(case=ALL, comp="case"),
+                "value",
+            ),
+            Input(
+                case_settings_id(case=ALL, comp="iteration"),
+                "value",
+            ),
+            Input(
+                vol_settings_id(case=ALL, comp="name"),
+                "value",
+            ),
+            Input(
+                vol_settings_id(case=ALL, comp="filter", selector=ALL),
+                "value",
+            ),
+            # Retried when the background loads are done
+            Input(view_comp_id(VolumetricsPlot.Ids.LOADED), "data"),
+            State(view_comp_id(VolumetricsPlot.Ids.PAGE_ID), "data"),
+        )
+        @traced_callback(self.logger)
+        @profiled_callback("SumoVolumetrics.VolumetricsView")
+        @cancellable_callback(self.logger, view_comp_id(VolumetricsPlot.Ids.PAGE_ID))
+        def _update_statistics(
+            cases, iterations, volnames, _filter_values, _loaded, _page_id
+        ):
+            # Not triggered by the histogram response, all responses are listed
+            explorer = self.provider.explorer()
+            if not cases or not iterations or not volnames:
+                return no_update
+            timer = PerfTimer()
+            keys = case_keys_for_input()
+            filters = _filters_for_cases(keys, filter_input_idx=3)
+            rows = self._statistics_rows(
+                explorer, keys, list(zip(cases, iterations, volnames, filters))
+            )
+            if rows is None:
+                return no_update
+            self.logger.info(f"Volumetric statistics table: {timer.lap_s()}")
+            return rows
 
         @callback(
             Output(view_comp_id(VolumetricsPlot.Ids.LOG), "children"),
             Input(view_comp_id(VolumetricsPlot.Ids.INTERVAL), "n_intervals"),
         )
         def _update_log(_):
-            logstring = self.log_stream.getvalue()
-            logstring = logstring.split("\n")
-            logstring.reverse()
-            logstring = ("\n").join(logstring)
-            return logstring
+            # Newest records first. Indented lines continue the record above
+            # them (e.g. a call waterfall), and keep their order.
+            records = []
+            for line in self.log_stream.getvalue().split("\n"):
+                if line.startswith(" ") and records:
+                    records[-1] += "\n" + line
+                else:
+                    records.append(line)
+            records.reverse()
+            return "\n".join(records)
 
         @callback(
             Output(view_comp_id(VolumetricsPlot.Ids.LOG), "id"),
@@ -305,3 +683,74 @@ class VolumetricsView(ViewABC):
             self.log_stream.truncate(0)
             self.log_stream.seek(0)
             return no_update
+
+
+# Subplot title of cases without data. make_subplots adds no annotation for
+# an empty title, which would shift the annotations of the following cases.
+_NO_TITLE = " "
+
+
+def _filters_for_cases(
+    case_keys: List[str], filter_input_idx: int
+) -> List[Dict[str, Sequence[Any]]]:
+    """Get the selected filter values per selector for each case, in the
+    order of `case_keys`, from a pattern-matching (case=ALL, selector=ALL)
+    filter input"""
+    filters: Dict[str, Dict[str, Sequence[Any]]] = defaultdict(dict)
+    for inp in ctx.inputs_list[filter_input_idx]:
+        filters[inp["id"]["case"]][inp["id"]["selector"]] = inp.get("value") or []
+    return [filters[case_key] for case_key in case_keys]
+
+
+def _partial_key(table_key: Tuple) -> Tuple:
+    return ("partial",) + table_key
+
+
+def _load_volumetric_index(
+    table_key: Tuple,
+    table_store: SharedTableStore,
+    explorer: Explorer,
+    case: str,
+    iteration: str,
+    volname: str,
+) -> Optional[VolumetricIndex]:
+    """Background job loading the ensemble volumetrics of a case into the
+    shared table store and building its index. The realizations loaded so far
+    are published as a partial table while loading."""
+    partial_key = _partial_key(table_key)
+    try:
+        return get_volumetric_index(
+            table_key,
+            partial(
+                table_store.get_or_fetch,
+                table_key,
+                get_ensemble_volumetrics_table,
+                explorer=explorer,
+                case_uuid=case,
+                iteration_id=iteration,
+                volumetric_name=volname,
+                on_partial=partial(table_store.put, partial_key),
+            ),
+        )
+    finally:
+        table_store.remove(partial_key)
+
+
+def _progress_text(progress: List[str]) -> str:
+    return f"Loading {', '.join(progress)}" if progress else ""
+
+
+def _job_progress_text(name: str, job_state: JobState) -> str:
+    return f"{name}: {job_state.progress_text(unit='realizations')}"
+
+
+def _histogram_trace(subplot_idx: int) -> dict:
+    axis_suffix = str(subplot_idx + 1) if subplot_idx > 0 else ""
+    return {
+        "type": "histogram",
+        "x": [],
+        "nbinsx": 20,
+        "marker": {"color": case_color(subplot_idx)},
+        "xaxis": f"x{axis_suffix}",
+        "yaxis": f"y{axis_suffix}",
+    }
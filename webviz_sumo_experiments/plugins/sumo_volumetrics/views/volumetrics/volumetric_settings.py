@@ -8,6 +8,9 @@ import webviz_core_components as wcc
 from webviz_config.utils import StrEnum
 from webviz_config.webviz_plugin_subclasses import SettingsGroupABC
 
+from webviz_sumo_experiments.utils.callback_utils import case_keys
+from ...volumetric_index import SELECTORS
+
 
 class VolumetricsSettings(SettingsGroupABC):
     class Ids(StrEnum):
@@ -15,53 +18,52 @@ class VolumetricsSettings(SettingsGroupABC):
 
         VOL_RESPONSE = "sumo-volresponse"
 
-    def __init__(self) -> None:
+    def __init__(self, number_of_cases: int = 2) -> None:
         super().__init__("Volumetrics")
+        self.number_of_cases = number_of_cases
 
     def layout(self) -> List[Component]:
         return [
             html.Div(
                 children=[
-                    wcc.Dropdown(
-                        clearable=False,
-                        label="Volumetric table Case A",
-                        id={
-                            "case": "A",
-                            "comp": "name",
-                            "id": self.get_unique_id().to_string(),
-                        },
-                        placeholder="No tables found",
-                    ),
-                    wcc.Dropdown(
-                        clearable=False,
-                        label="Volumetric response Case A",
-                        id={
-                            "case": "A",
-                            "comp": "response",
-                            "id": self.get_unique_id().to_string(),
-                        },
-                        placeholder="No responses found",
-                    ),
-                    wcc.Dropdown(
-                        clearable=False,
-                        label="Volumetric table Case B",
-                        id={
-                            "case": "B",
-                            "comp": "name",
-                            "id": self.get_unique_id().to_string(),
-                        },
-                        placeholder="No tables found'",
-                    ),
-                    wcc.Dropdown(
-                        clearable=False,
-                        label="Volumetric response Case B",
-                        id={
-                            "case": "B",
-                            "comp": "response",
-                            "id": self.get_unique_id().to_string(),
-                        },
-                        placeholder="No responses found'",
-                    ),
+                    component
+                    for case_key in case_keys(self.number_of_cases)
+                    for component in (
+                        wcc.Dropdown(
+                            clearable=False,
+                            label=f"Volumetric table Case {case_key}",
+                            id={
+                                "case": case_key,
+                                "comp": "name",
+                                "id": self.get_unique_id().to_string(),
+                            },
+                            placeholder="No tables found",
+                        ),
+                        wcc.Dropdown(
+                            clearable=False,
+                            label=f"Volumetric response Case {case_key}",
+                            id={
+                                "case": case_key,
+                                "comp": "response",
+                                "id": self.get_unique_id().to_string(),
+                            },
+                            placeholder="No responses found",
+                        ),
+                        *(
+                            wcc.Dropdown(
+                                multi=True,
+                                label=f"{selector.capitalize()} filter Case {case_key}",
+                                id={
+                                    "case": case_key,
+                                    "comp": "filter",
+                                    "selector": selector,
+                                    "id": self.get_unique_id().to_string(),
+                                },
+                                placeholder="All",
+                            )
+                            for selector in SELECTORS
+                        ),
+                    )
                 ]
             )
         ]
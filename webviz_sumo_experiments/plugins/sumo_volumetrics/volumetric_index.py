@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Columns of a volumetric table identifying the rows it is split by
+SELECTORS = ["ZONE", "REGION", "FACIES", "LICENSE"]
+
+# P10 is the high estimate, i.e. the 90th percentile, as for the time series
+STATISTICS = ["mean", "p10", "p50", "p90", "min", "max"]
+
+_FilterKey = Tuple[Tuple[str, Tuple[Any, ...]], ...]
+
+
+class VolumetricIndex:
+    """Per realization partial sums of all responses of an ensemble
+    volumetric table, for each combination of the selector values present
+    (e.g. ZONE x REGION).
+
+    The raw table is grouped once when the index is built. Filtering on
+    selector values then only masks the (much smaller) partial sums and
+    adds them up per realization, without touching the raw rows. The
+    resulting realizations x responses matrices of the most recent filters
+    are kept, so switching response reuses them.
+    """
+
+    _MAX_MATRICES = 8
+
+    def __init__(self, table: pa.Table) -> None:
+        self.selectors = [col for col in SELECTORS if col in table.column_names]
+        self.responses = [
+            col
+            for col in table.column_names
+            if col not in self.selectors
+            and col != "REAL"
+            and (
+                pa.types.is_integer(table.schema.field(col).type)
+                or pa.types.is_floating(table.schema.field(col).type)
+            )
+        ]
+        partials = table.group_by(["REAL"] + self.selectors).aggregate(
+            [(response, "sum") for response in self.responses]
+        )
+        partials = partials.take(pc.sort_indices(partials, [("REAL", "ascending")]))
+
+        self.realizations, real_starts = np.unique(
+            partials.column("REAL").to_numpy(), return_index=True
+        )
+        self._real_starts = real_starts
+        # Partial sums, one row per REAL x selector combination sorted by REAL
+        self._sums = np.column_stack(
+            [
+                np.nan_to_num(
+                    partials.column(f"{response}_sum").to_numpy(zero_copy_only=False)
+                ).astype(np.float64)
+                for response in self.responses
+            ]
+            or [np.zeros(partials.num_rows)]
+        )
+        self._codes: Dict[str, np.ndarray] = {}
+        self._values: Dict[str, List[Any]] = {}
+        for selector in self.selectors:
+            encoded = pc.dictionary_encode(partials.column(selector)).combine_chunks()
+            self._codes[selector] = (
+                encoded.indices.fill_null(-1).to_numpy().astype(np.int64)
+            )
+            self._values[selector] = encoded.dictionary.to_pylist()
+
+        self._matrices: "OrderedDict[_FilterKey, np.ndarray]" = OrderedDict()
+        self._matrices_lock = threading.Lock()
+
+    def selector_values(self, selector: str) -> List[Any]:
+        """Get the sorted values of a selector, empty if not in the table"""
+        return sorted(self._values.get(selector, []), key=str)
+
+    def realization_matrix(self, filters: Dict[str, Sequence[Any]]) -> np.ndarray:
+        """Get the sums of all responses per realization over the rows matching
+        the filters, as a realizations x responses matrix in the order of
+        `realizations` and `responses`. A filter without values, or on a
+        selector not in the table, keeps all rows."""
+        key = tuple(
+            sorted(
+                (selector, tuple(sorted(selected, key=str)))
+                for selector, selected in filters.items()
+                if selected and selector in self._codes
+            )
+        )
+        with self._matrices_lock:
+            if key in self._matrices:
+                self._matrices.move_to_end(key)
+                return self._matrices[key]
+
+        mask = np.ones(len(self._sums), dtype=bool)
+        for selector, selected in key:
+            allowed = np.isin(self._values[selector], list(selected))
+            # Rows without a selector value (code -1) never match a filter
+            mask &= np.append(allowed, False)[self._codes[selector]]
+        if len(self.realizations) == 0:
+            matrix = np.zeros((0, len(self.responses)))
+        else:
+            matrix = np.add.reduceat(
+                np.where(mask[:, np.newaxis], self._sums, 0.0),
+                self._real_starts,
+                axis=0,
+            )
+
+        with self._matrices_lock:
+            self._matrices[key] = matrix
+            while len(self._matrices) > self._MAX_MATRICES:
+                self._matrices.popitem(last=False)
+        return matrix
+
+    def realization_sums(
+        self, response: str, filters: Dict[str, Sequence[Any]]
+    ) -> np.ndarray:
+        """Get the sum of a response per realization (in the order of
+        `realizations`) over the rows matching the filters"""
+        if response not in self.responses:
+            return np.zeros(len(self.realizations))
+        return self.realization_matrix(filters)[:, self.responses.index(response)]
+
+    def statistics(self, filters: Dict[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+        """Get the ensemble statistics of all responses over the rows matching
+        the filters, computed in one pass over the realizations x responses
+        matrix. Maps each of STATISTICS to an array in the order of
+        `responses`."""
+        matrix = self.realization_matrix(filters)
+        if len(matrix) == 0:
+            return {stat: np.full(len(self.responses), np.nan) for stat in STATISTICS}
+        p90, p50, p10 = np.percentile(matrix, [10, 50, 90], axis=0)
+        return {
+            "mean": matrix.mean(axis=0),
+            "p10": p10,
+            "p50": p50,
+            "p90": p90,
+            "min": matrix.min(axis=0),
+            "max": matrix.max(axis=0),
+        }
+
+
+_MAX_INDEXES = 32
+_INDEXES: "OrderedDict[Hashable, VolumetricIndex]" = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_volumetric_index(
+    key: Hashable, get_table: Callable[[], Optional[pa.Table]]
+) -> Optional[VolumetricIndex]:
+    """Get the index of an ensemble volumetric table, building it from the
+    table returned by `get_table` on first use."""
+    with _INDEXES_LOCK:
+        if key in _INDEXES:
+            _INDEXES.move_to_end(key)
+            return _INDEXES[key]
+
+    table = get_table()
+    if table is None:
+        return None
+    index = VolumetricIndex(table)
+    with _INDEXES_LOCK:
+        _INDEXES[key] = index
+        while len(_INDEXES) > _MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return index
@@ -0,0 +1,174 @@
+from contextvars import ContextVar
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Tuple
+
+from webviz_config.utils import StrEnum
+
+from .cancellation import uncancellable
+from .fetch_scheduler import FetchScheduler
+
+
+class JobStatus(StrEnum):
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobState(NamedTuple):
+    status: JobStatus
+    done: int = 0
+    """Number of steps done, see `report_progress`"""
+    total: int = 0
+    """Number of steps, 0 until known"""
+    updated_s: float = 0.0
+    """Time of the last update, as time.time()"""
+    has_result: bool = False
+    """Whether a finished job returned a result, False if there was no data"""
+    error: str = ""
+
+    def progress_text(self, unit: str) -> str:
+        if self.status == JobStatus.FAILED:
+            return f"failed: {self.error}"
+        if self.total == 0:
+            return "starting"
+        return f"{self.done}/{self.total} {unit}"
+
+
+_CURRENT_JOB: ContextVar[Optional[Tuple["BackgroundJobs", Hashable]]] = ContextVar(
+    "sumo_background_job", default=None
+)
+
+
+class BackgroundJobs:
+    """Long running loads run as background jobs, so a callback can start a
+    load, return at once and poll for its progress instead of blocking a web
+    worker (and hitting proxy timeouts) until the load is done.
+
+    Jobs run on a small thread pool of their own in the worker process that
+    starts them, so long loads do not hold up the data fetches of callbacks. Their state is kept in files, so any worker process can report the
+    progress of a job, and does not start it again while it is running. The
+    result of a job is not kept here; jobs store it where the callbacks can
+    find it, e.g. in the shared table store.
+
+    A job that failed, or whose state has not been updated for `stale_s`
+    seconds (e.g. its worker was restarted, or it found no data), is started
+    again on request. A job that is done with a result is only started again
+    after `forget`, e.g. when its result has been evicted.
+    """
+
+    def __init__(
+        self, directory: Path, stale_s: float = 120.0, max_workers: int = 2
+    ) -> None:
+        self.directory = Path(directory)
+        self.stale_s = stale_s
+        self._scheduler = FetchScheduler(
+            max_workers=max_workers, thread_name_prefix="sumo-job"
+        )
+
+    def _path(self, key: Hashable) -> Path:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def state(self, key: Hashable) -> Optional[JobState]:
+        try:
+            state = json.loads(self._path(key).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return JobState(**{**state, "status": JobStatus(state["status"])})
+
+    def start(
+        self, key: Hashable, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> JobState:
+        """Start a job running `func`, unless it is already running or done.
+        Returns the state of the job."""
+        state = self.state(key)
+        if state is not None and not self._restartable(state):
+            return state
+        state = JobState(status=JobStatus.RUNNING, updated_s=time.time())
+        self._write(key, state)
+        self._scheduler.submit(
+            ("job", key), uncancellable(self._run), key, func, *args, **kwargs
+        )
+        return state
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the state of a finished job, so it can be started again"""
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def report_progress(self, key: Hashable, done: int, total: int) -> None:
+        self._write(
+            key,
+            JobState(
+                status=JobStatus.RUNNING, done=done, total=total, updated_s=time.time()
+            ),
+        )
+
+    def _restartable(self, state: JobState) -> bool:
+        if state.status == JobStatus.DONE and state.has_result:
+            return False
+        return (
+            state.status == JobStatus.FAILED
+            or time.time() - state.updated_s > self.stale_s
+        )
+
+    def _run(
+        self, key: Hashable, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> None:
+        job_token = _CURRENT_JOB.set((self, key))
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._write(
+                key,
+                JobState(
+                    status=JobStatus.FAILED, updated_s=time.time(), error=repr(exc)
+                ),
+            )
+            return
+        finally:
+            _CURRENT_JOB.reset(job_token)
+        state = self.state(key)
+        self._write(
+            key,
+            JobState(
+                status=JobStatus.DONE,
+                done=state.done if state else 0,
+                total=state.total if state else 0,
+                updated_s=time.time(),
+                has_result=result is not None,
+            ),
+        )
+
+    def _write(self, key: Hashable, state: JobState) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(state._asdict(), tmp_file)
+        os.replace(tmp_name, self._path(key))
+
+
+def report_progress(done: int, total: int) -> None:
+    """Report the progress of the running background job, if any. Loads that
+    can run as jobs call this after each step, e.g. each realization."""
+    job = _CURRENT_JOB.get()
+    if job is not None:
+        jobs, key = job
+        jobs.report_progress(key, done, total)
+
+
+BACKGROUND_JOBS = BackgroundJobs(
+    directory=Path(
+        os.environ.get(
+            "WEBVIZ_SUMO_JOB_DIR", Path(tempfile.gettempdir()) / "webviz-sumo-jobs"
+        )
+    ),
+    max_workers=int(os.environ.get("WEBVIZ_SUMO_JOB_WORKERS", "2")),
+)
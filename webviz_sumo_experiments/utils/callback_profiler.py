@@ -0,0 +1,112 @@
+import cProfile
+from datetime import datetime
+import functools
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+
+class ProfilerConfig(NamedTuple):
+    directory: Path
+    """Directory the .prof files (pstats format) are written to"""
+    min_duration_s: float = 0.0
+    """Only callbacks running at least this long are kept"""
+    max_files: int = 100
+    """The oldest profiles are deleted beyond this number of files"""
+
+
+def _config_from_env() -> Optional[ProfilerConfig]:
+    directory = os.environ.get("WEBVIZ_SUMO_PROFILE_DIR")
+    if not directory:
+        return None
+    return ProfilerConfig(
+        directory=Path(directory),
+        min_duration_s=float(os.environ.get("WEBVIZ_SUMO_PROFILE_MIN_S", "0")),
+        max_files=int(os.environ.get("WEBVIZ_SUMO_PROFILE_MAX_FILES", "100")),
+    )
+
+
+_CONFIG: Optional[ProfilerConfig] = _config_from_env()
+# Only one profiler can be active at a time, concurrent callbacks run
+# unprofiled while another one is being profiled.
+_PROFILER_LOCK = threading.Lock()
+
+
+def configure_profiling(
+    directory: Optional[Path], min_duration_s: float = 0.0, max_files: int = 100
+) -> None:
+    """Enable callback profiling, or disable it if `directory` is None.
+    Profiling is otherwise enabled by setting WEBVIZ_SUMO_PROFILE_DIR (with
+    WEBVIZ_SUMO_PROFILE_MIN_S and WEBVIZ_SUMO_PROFILE_MAX_FILES)."""
+    global _CONFIG  # pylint: disable=global-statement
+    _CONFIG = (
+        None
+        if directory is None
+        else ProfilerConfig(
+            directory=Path(directory),
+            min_duration_s=min_duration_s,
+            max_files=max_files,
+        )
+    )
+
+
+def profiled_callback(owner: str) -> Callable:
+    """Decorator for Dash callbacks that profiles each call with cProfile
+    when profiling is enabled, and writes the profile to
+    `<directory>/<time>-<pid>-<owner>.<callback>.prof`.
+
+    Only the callback thread is profiled; fetches running on the fetch
+    scheduler show up as time spent waiting for their futures.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = f"{owner}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            config = _CONFIG
+            if config is None or not _PROFILER_LOCK.acquire(blocking=False):
+                return func(*args, **kwargs)
+            try:
+                profiler = cProfile.Profile()
+                start_s = time.perf_counter()
+                profiler.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+                    if time.perf_counter() - start_s >= config.min_duration_s:
+                        _write_profile(profiler, config, name)
+            finally:
+                _PROFILER_LOCK.release()
+
+        return wrapper
+
+    return decorator
+
+
+def _write_profile(profiler: cProfile.Profile, config: ProfilerConfig, name: str):
+    """Write a profile and prune the oldest beyond `max_files`. Best effort:
+    this runs when the callback returns, and must never replace its result,
+    e.g. when another worker prunes the same files."""
+    try:
+        config.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%dT%H%M%S.%f")
+        profiler.dump_stats(config.directory / f"{timestamp}-{os.getpid()}-{name}.prof")
+
+        profiles = []
+        for path in config.directory.glob("*.prof"):
+            try:
+                profiles.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                pass
+        profiles.sort()
+        for _, path in profiles[: max(len(profiles) - config.max_files, 0)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    except Exception:  # pylint: disable=broad-except
+        pass
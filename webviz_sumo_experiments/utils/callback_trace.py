@@ -0,0 +1,130 @@
+from collections import deque
+from contextvars import ContextVar
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Deque, List, NamedTuple, Optional
+
+# Number of finished callback traces kept in RECENT_TRACES
+MAX_RECENT_TRACES = 50
+# Width of the waterfall bars in the log
+WATERFALL_WIDTH = 40
+
+
+class HttpCall(NamedTuple):
+    method: str
+    endpoint: str
+    summary: str
+    status: Optional[int]
+    num_bytes: int
+    start_s: float
+    elapsed_s: float
+
+
+class CallbackTrace:
+    """The Sumo HTTP calls made while running a callback"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start_s = time.perf_counter()
+        self.elapsed_s = 0.0
+        self.calls: List[HttpCall] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: HttpCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def waterfall(self) -> str:
+        """Get a text waterfall of the calls, with the offset from the start
+        of the callback, duration, status, size and a bar per call"""
+        with self._lock:
+            calls = sorted(self.calls, key=lambda call: call.start_s)
+        total_s = max(self.elapsed_s, 1e-6)
+        total_bytes = sum(call.num_bytes for call in calls)
+        http_s = sum(call.elapsed_s for call in calls)
+        lines = [
+            f"{self.name}: {self.elapsed_s:.3f}s, {len(calls)} Sumo calls, "
+            f"{http_s:.3f}s in HTTP, {_format_bytes(total_bytes)}"
+        ]
+        for call in calls:
+            offset_s = call.start_s - self.start_s
+            first = int(WATERFALL_WIDTH * offset_s / total_s)
+            width = max(1, int(WATERFALL_WIDTH * call.elapsed_s / total_s))
+            bar = (" " * first + "#" * width)[:WATERFALL_WIDTH].ljust(WATERFALL_WIDTH)
+            lines.append(
+                f"  |{bar}| +{offset_s:.3f}s {call.elapsed_s:.3f}s "
+                f"{call.status if call.status is not None else '---'} "
+                f"{_format_bytes(call.num_bytes):>9} {call.method} {call.endpoint} "
+                f"{call.summary}"
+            )
+        return "\n".join(lines)
+
+
+_CURRENT_TRACE: ContextVar[Optional[CallbackTrace]] = ContextVar(
+    "sumo_callback_trace", default=None
+)
+
+RECENT_TRACES: Deque[CallbackTrace] = deque(maxlen=MAX_RECENT_TRACES)
+
+
+def current_trace() -> Optional[CallbackTrace]:
+    return _CURRENT_TRACE.get()
+
+
+def record_call(
+    method: str,
+    endpoint: str,
+    summary: str,
+    status: Optional[int],
+    num_bytes: int,
+    start_s: float,
+) -> None:
+    """Record a finished HTTP call in the trace of the running callback, if any"""
+    trace = _CURRENT_TRACE.get()
+    if trace is None:
+        return
+    trace.add(
+        HttpCall(
+            method=method,
+            endpoint=endpoint,
+            summary=summary,
+            status=status,
+            num_bytes=num_bytes,
+            start_s=start_s,
+            elapsed_s=time.perf_counter() - start_s,
+        )
+    )
+
+
+def traced_callback(logger: logging.Logger) -> Callable:
+    """Decorator for Dash callbacks that traces the Sumo calls made while the
+    callback runs, and writes a waterfall of them to `logger` when it is
+    done. Calls made on the fetch scheduler threads are included."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trace = CallbackTrace(func.__name__)
+            token = _CURRENT_TRACE.set(trace)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _CURRENT_TRACE.reset(token)
+                trace.elapsed_s = time.perf_counter() - trace.start_s
+                RECENT_TRACES.append(trace)
+                if trace.calls:
+                    logger.info(trace.waterfall())
+
+        return wrapper
+
+    return decorator
+
+
+def _format_bytes(num_bytes: int) -> str:
+    if num_bytes >= 2**20:
+        return f"{num_bytes / 2**20:.1f} MB"
+    if num_bytes >= 2**10:
+        return f"{num_bytes / 2**10:.1f} kB"
+    return f"{num_bytes} B"
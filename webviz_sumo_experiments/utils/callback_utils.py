@@ -0,0 +1,50 @@
+from string import ascii_uppercase
+from typing import List, Optional
+
+from dash import ctx
+
+CASE_COLORS = [
+    "red",
+    "blue",
+    "green",
+    "orange",
+    "purple",
+    "brown",
+    "magenta",
+    "teal",
+]
+
+
+def case_keys(number_of_cases: int) -> List[str]:
+    """Get the keys identifying each case selection, "A", "B", ..."""
+    return [
+        ascii_uppercase[idx] if idx < len(ascii_uppercase) else str(idx)
+        for idx in range(number_of_cases)
+    ]
+
+
+def case_color(case_idx: int) -> str:
+    return CASE_COLORS[case_idx % len(CASE_COLORS)]
+
+
+def triggered_case() -> Optional[str]:
+    """Get the case key (e.g. "A") if all inputs that triggered the current
+    callback belong to a single case, otherwise None.
+
+    Inputs without a case key (e.g. a shared mode selector) or an initial
+    call where nothing was triggered return None, meaning a full redraw is needed.
+    """
+    triggered_ids = list(ctx.triggered_prop_ids.values())
+    if not triggered_ids:
+        return None
+    case_keys = set()
+    for component_id in triggered_ids:
+        if not isinstance(component_id, dict) or "case" not in component_id:
+            return None
+        case_keys.add(component_id["case"])
+    return case_keys.pop() if len(case_keys) == 1 else None
+
+
+def case_keys_for_input(input_idx: int = 0) -> List[str]:
+    """Get the case keys, in callback order, of a pattern-matching ALL input"""
+    return [inp["id"]["case"] for inp in ctx.inputs_list[input_idx]]
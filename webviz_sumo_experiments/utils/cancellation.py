@@ -0,0 +1,184 @@
+from collections import Counter
+from contextvars import ContextVar
+import functools
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from dash import ctx
+from dash.exceptions import PreventUpdate
+import flask
+
+
+class Cancelled(Exception):
+    """Raised at a cancellation point when the work is no longer wanted"""
+
+
+class CancelToken:
+    """Cancellation flag of a callback run, checked cooperatively by the work
+    it started (see `check_cancelled`)"""
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class SharedCancelToken:
+    """Cancellation flag of a fetch shared by several callback runs (see
+    `FetchScheduler`). The fetch is only cancelled once every run waiting for
+    it is cancelled, and no run can join it after that."""
+
+    def __init__(self, token: Optional[CancelToken]) -> None:
+        self._tokens: List[Optional[CancelToken]] = [token]
+        self._lock = threading.Lock()
+
+    def join(self, token: Optional[CancelToken]) -> bool:
+        """Add a waiting run, False if the fetch is already cancelled"""
+        with self._lock:
+            if self._is_cancelled():
+                return False
+            self._tokens.append(token)
+            return True
+
+    def is_cancelled(self) -> bool:
+        with self._lock:
+            return self._is_cancelled()
+
+    def _is_cancelled(self) -> bool:
+        # Work started outside a cancellable callback (None) is never cancelled
+        return all(token is not None and token.is_cancelled() for token in self._tokens)
+
+
+_CURRENT_TOKEN: ContextVar[Optional[Any]] = ContextVar(
+    "sumo_cancel_token", default=None
+)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _CURRENT_TOKEN.get()
+
+
+def check_cancelled() -> None:
+    """Cancellation point: raise Cancelled if the running work is superseded"""
+    token = _CURRENT_TOKEN.get()
+    if token is not None and token.is_cancelled():
+        CANCELLATION_COUNTS["checkpoint"] += 1
+        raise Cancelled()
+
+
+def run_with_token(token: Optional[Any], func: Callable, *args, **kwargs) -> Any:
+    """Run `func` with `token` as the token checked by `check_cancelled`"""
+    reset_token = _CURRENT_TOKEN.set(token)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _CURRENT_TOKEN.reset(reset_token)
+
+
+def uncancellable(func: Callable) -> Callable:
+    """Wrap `func` so it runs to completion even if the callback that started
+    it is superseded, e.g. for cache revalidation that benefits everyone"""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return run_with_token(None, func, *args, **kwargs)
+
+    return wrapper
+
+
+# Metrics: the number of superseded runs per callback ("callback:<name>"),
+# and of cancellation points that stopped work ("checkpoint")
+CANCELLATION_COUNTS: Counter = Counter()
+
+_LATEST: Dict[Hashable, CancelToken] = {}
+_LATEST_LOCK = threading.Lock()
+
+
+# Clientside callback function giving each page (browser tab or window) a
+# random id, stored in a dcc.Store and passed to cancellable callbacks as State
+PAGE_ID_JS = """
+function(_) {
+    if (window.crypto && window.crypto.randomUUID) {
+        return window.crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+"""
+
+
+def _session_key() -> str:
+    """Identify the user of the running request. Dash requests carry no
+    session id, so the credentials and client are used. Pages of the same
+    user are told apart by their page id, see `cancellable_callback`."""
+    if not flask.has_request_context():
+        return ""
+    request = flask.request
+    parts = [
+        request.headers.get("X-Auth-Request-Access-Token", ""),
+        request.headers.get("X-Forwarded-For", request.remote_addr or ""),
+        request.headers.get("User-Agent", ""),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def cancellable_callback(
+    logger: logging.Logger, page_id: str, own_key_triggers: Sequence[str] = ()
+) -> Callable:
+    """Decorator for Dash callbacks that cancels a running call when a newer
+    call for the same outputs arrives from the same page.
+
+    `page_id` is the id of a dcc.Store filled with a random id per page by
+    `PAGE_ID_JS`. The callback must take its data as State, so several tabs
+    of the same user do not cancel each other. Until the store is filled, the
+    calls of a user's pages are not told apart.
+
+    Calls triggered by one of `own_key_triggers` (e.g. a dcc.Interval
+    polling for data still loading) only cancel, and are only cancelled by,
+    calls with the same trigger.
+
+    The superseded call stops at the next cancellation point, in its own
+    thread or in the fetches it started, and returns no update.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (
+                _session_key(),
+                ctx.states.get(f"{page_id}.data"),
+                func.__name__,
+                repr(ctx.outputs_list),
+                ctx.triggered_id if ctx.triggered_id in own_key_triggers else None,
+            )
+            token = CancelToken()
+            with _LATEST_LOCK:
+                previous = _LATEST.get(key)
+                _LATEST[key] = token
+            if previous is not None:
+                previous.cancel()
+
+            start_s = time.perf_counter()
+            try:
+                return run_with_token(token, func, *args, **kwargs)
+            except Cancelled:
+                CANCELLATION_COUNTS[f"callback:{func.__name__}"] += 1
+                logger.info(
+                    f"{func.__name__}: superseded by a newer request, cancelled "
+                    f"after {time.perf_counter() - start_s:.3f}s"
+                )
+                raise PreventUpdate
+            finally:
+                with _LATEST_LOCK:
+                    if _LATEST.get(key) is token:
+                        del _LATEST[key]
+
+        return wrapper
+
+    return decorator
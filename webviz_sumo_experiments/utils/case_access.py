@@ -0,0 +1,61 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Hashable, Tuple
+
+from fmu.sumo.explorer import Explorer
+import httpx
+
+from .search_cache import credentials_scope
+from .sumo_query import build_query
+from .sumo_transport import sumo_get
+
+# How long a verified (or denied) access is trusted before asking Sumo again
+ACCESS_TTL_S = 300
+_MAX_ENTRIES = 10000
+
+_ACCESS: "OrderedDict[Tuple[Hashable, str], Tuple[bool, float]]" = OrderedDict()
+_ACCESS_LOCK = threading.Lock()
+
+
+def has_case_access(explorer: Explorer, case_uuid: str) -> bool:
+    """Check if the user of an explorer can read a case. The check is a
+    single hit search for the case object, cached for ACCESS_TTL_S per user
+    and case."""
+    key = (credentials_scope(explorer), case_uuid)
+    with _ACCESS_LOCK:
+        entry = _ACCESS.get(key)
+    if entry is not None and time.monotonic() - entry[1] < ACCESS_TTL_S:
+        return entry[0]
+
+    try:
+        hits = sumo_get(
+            explorer,
+            "/search",
+            query=build_query({"_id": case_uuid, "class": "case"}),
+            size=1,
+            select=False,
+        )["hits"]["hits"]
+        allowed = bool(hits)
+    except httpx.HTTPStatusError:
+        allowed = False
+
+    with _ACCESS_LOCK:
+        _ACCESS[key] = (allowed, time.monotonic())
+        _ACCESS.move_to_end(key)
+        while len(_ACCESS) > _MAX_ENTRIES:
+            _ACCESS.popitem(last=False)
+    return allowed
+
+
+def case_scope(explorer: Explorer, case_uuid: str) -> Hashable:
+    """Get the scope to include in the cache keys of data belonging to a case.
+
+    Users with access to the case share one scope, so blobs, tables and
+    metadata of a case are cached once for all of them. Anyone else gets a
+    scope of their own, so they never see data cached for other users and
+    are answered by Sumo according to their own permissions.
+    """
+    if has_case_access(explorer, case_uuid):
+        return ("case", case_uuid)
+    return credentials_scope(explorer)
@@ -0,0 +1,62 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .cancellation import SharedCancelToken, current_token, run_with_token
+
+
+class FetchScheduler:
+    """Runs data fetches concurrently on a shared thread pool.
+
+    Fetches are identified by a key. Submitting a fetch while another fetch
+    with the same key is still in flight returns the in-flight future instead
+    of starting a new one, so overlapping requests (e.g. two cases sharing the
+    same DATE table, or a redraw while the previous one is still loading) only
+    hit Sumo once.
+
+    Fetches run in a copy of the submitter's context, so context variables
+    like the callback trace follow the work onto the pool threads. A shared
+    fetch is cancelled only when all the callback runs waiting for it are (see
+    `cancellation.cancellable_callback`); a cancelled fetch is not joined, a
+    new one is started instead.
+    """
+
+    def __init__(
+        self, max_workers: int = 8, thread_name_prefix: str = "sumo-fetch"
+    ) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+        self._in_flight: Dict[Hashable, Tuple[Future, SharedCancelToken]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, key: Hashable, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Future:
+        token = current_token()
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None and in_flight[1].join(token):
+                return in_flight[0]
+            shared_token = SharedCancelToken(token)
+            future = self._executor.submit(
+                contextvars.copy_context().run,
+                run_with_token,
+                shared_token,
+                func,
+                *args,
+                **kwargs,
+            )
+            self._in_flight[key] = (future, shared_token)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None and in_flight[0] is future:
+                del self._in_flight[key]
+
+
+FETCH_SCHEDULER = FetchScheduler()
@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Iterator, Optional
+
+import pyarrow as pa
+
+
+def _default_spill_directory() -> Path:
+    # Spilled tables must go to disk, so unlike the shared table store this
+    # does not prefer /dev/shm
+    return Path(tempfile.gettempdir()) / "webviz-sumo-spill"
+
+
+# Schema metadata marking spilled tables
+_SPILLED_KEY = b"webviz_sumo_spilled"
+
+
+class MemoryBudget:
+    """Memory budget of the ensemble loads of a worker process.
+
+    Each load reserves its estimated size before fetching. A load larger than
+    `request_bytes`, or one that would take the loads in flight in this
+    process past `process_bytes`, is not reserved and should spill to disk
+    instead: it is then slower, but the worker is not pushed past its memory
+    limit and OOM killed.
+    """
+
+    def __init__(self, process_bytes: int, request_bytes: int) -> None:
+        self.process_bytes = process_bytes
+        self.request_bytes = request_bytes
+        self._reserved_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def reserved_bytes(self) -> int:
+        return self._reserved_bytes
+
+    @contextmanager
+    def reserve(self, estimated_bytes: int) -> Iterator[bool]:
+        """Reserve memory for a load for the duration of the context. Yields
+        True if the load fits in memory, and False if it should spill."""
+        with self._lock:
+            in_memory = (
+                estimated_bytes <= self.request_bytes
+                and self._reserved_bytes + estimated_bytes <= self.process_bytes
+            )
+            if in_memory:
+                self._reserved_bytes += estimated_bytes
+        try:
+            yield in_memory
+        finally:
+            if in_memory:
+                with self._lock:
+                    self._reserved_bytes -= estimated_bytes
+
+
+def new_spill_path() -> Path:
+    """Get the path of a new, empty spill file"""
+    SPILL_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(
+        dir=SPILL_DIRECTORY, prefix=f"{os.getpid()}-", suffix=".arrow"
+    )
+    os.close(fd)
+    return Path(name)
+
+
+def read_spilled(path: Path) -> pa.Table:
+    """Read a spilled Arrow IPC file as a memory mapped table, and remove the
+    file. The mapping keeps the data readable until the table is released,
+    while its pages can be dropped from memory and read back from disk.
+
+    The table is marked as spilled (see `is_spilled`), so caches can keep it
+    on disk too, instead of copying it into memory."""
+    try:
+        with pa.ipc.open_file(pa.memory_map(str(path))) as reader:
+            table = reader.read_all()
+    finally:
+        os.unlink(path)
+    return table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _SPILLED_KEY: b"1"}
+    )
+
+
+def is_spilled(table: pa.Table) -> bool:
+    """Whether a table was too large for the memory budget, see `read_spilled`"""
+    return _SPILLED_KEY in (table.schema.metadata or {})
+
+
+class SpillWriter:
+    """Writes a table chunk by chunk to a spill file, so only one chunk is
+    held in memory at a time.
+
+    The schema is taken from the first chunk. Later chunks are conformed to
+    it: columns are reordered, missing columns are filled with nulls and the
+    types are cast.
+    """
+
+    def __init__(self) -> None:
+        self.path = new_spill_path()
+        self.schema: Optional[pa.Schema] = None
+        self._sink: Optional[pa.OSFile] = None
+        self._writer: Optional[pa.ipc.RecordBatchFileWriter] = None
+
+    def __enter__(self) -> "SpillWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._close()
+        if self.path.exists():
+            os.unlink(self.path)
+
+    def write(self, table: pa.Table) -> None:
+        if self._writer is None:
+            self.schema = table.schema
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+        self._writer.write_table(_conform(table, self.schema))
+
+    def read(self) -> Optional[pa.Table]:
+        """Finish the file and read it back memory mapped, None if no chunks
+        were written"""
+        self._close()
+        if self.schema is None:
+            return None
+        return read_spilled(self.path)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = None
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    return pa.table(
+        [
+            (
+                table.column(field.name).cast(field.type)
+                if field.name in table.column_names
+                else pa.nulls(table.num_rows, field.type)
+            )
+            for field in schema
+        ],
+        schema=schema,
+    )
+
+
+SPILL_DIRECTORY = Path(
+    os.environ.get("WEBVIZ_SUMO_SPILL_DIR", _default_spill_directory())
+)
+MEMORY_BUDGET = MemoryBudget(
+    process_bytes=int(os.environ.get("WEBVIZ_SUMO_PROCESS_BUDGET_MB", "4096")) * 2**20,
+    request_bytes=int(os.environ.get("WEBVIZ_SUMO_REQUEST_BUDGET_MB", "1024")) * 2**20,
+)
@@ -0,0 +1,33 @@
+import gzip
+
+import flask
+
+# Responses smaller than this are not worth the compression overhead
+MIN_COMPRESS_SIZE = 1024
+COMPRESS_LEVEL = 6
+
+
+def compress_callback_responses(server: flask.Flask) -> None:
+    """Gzip compress Dash callback responses for clients that accept it.
+    Safe to call several times, the hook is only registered once per server."""
+    if server.extensions.get("sumo_callback_compression"):
+        return
+    server.extensions["sumo_callback_compression"] = True
+
+    @server.after_request
+    def _compress(response: flask.Response) -> flask.Response:
+        if (
+            not flask.request.path.endswith("/_dash-update-component")
+            or response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "gzip" not in flask.request.headers.get("Accept-Encoding", "")
+        ):
+            return response
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        return response
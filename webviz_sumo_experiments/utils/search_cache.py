@@ -0,0 +1,207 @@
+from collections import OrderedDict
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fmu.sumo.explorer import Explorer
+from webviz_config.utils import StrEnum
+
+from .cancellation import uncancellable
+from .fetch_scheduler import FETCH_SCHEDULER
+from .sumo_transport import explorer_call, sumo_credentials, sumo_get
+
+
+class QueryType(StrEnum):
+    FIELDS = "fields"
+    CASES = "cases"
+    CASE_NAME = "case_name"
+    ITERATIONS = "iterations"
+    VECTOR_NAMES = "vector_names"
+    VOLUMETRIC_NAMES = "volumetric_names"
+
+
+class Ttl(NamedTuple):
+    fresh_s: float
+    """Entries younger than this are served without contacting Sumo"""
+    stale_s: float
+    """Entries younger than fresh_s + stale_s are served while they are
+    revalidated in the background"""
+
+
+# New cases are uploaded now and then, while the content of an uploaded case
+# (names, vectors, realizations) practically never changes.
+TTLS: Dict[QueryType, Ttl] = {
+    QueryType.FIELDS: Ttl(fresh_s=3600, stale_s=24 * 3600),
+    QueryType.CASES: Ttl(fresh_s=60, stale_s=3600),
+    QueryType.CASE_NAME: Ttl(fresh_s=3600, stale_s=24 * 3600),
+    QueryType.ITERATIONS: Ttl(fresh_s=600, stale_s=24 * 3600),
+    QueryType.VECTOR_NAMES: Ttl(fresh_s=3600, stale_s=24 * 3600),
+    QueryType.VOLUMETRIC_NAMES: Ttl(fresh_s=600, stale_s=24 * 3600),
+}
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fetched_s: float
+
+
+class SearchCache:
+    """In-memory cache of Sumo metadata query results with per query type
+    time-to-live and stale-while-revalidate.
+
+    A fresh entry is returned directly. A stale entry is returned as well, but
+    triggers a refetch on the fetch scheduler so the next lookup gets the
+    updated result. Expired or missing entries are fetched synchronously.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_fetch(
+        self,
+        key: Hashable,
+        query_type: QueryType,
+        fetch: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        ttl = TTLS[query_type]
+        key = (query_type, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            age_s = time.monotonic() - entry.fetched_s
+            if age_s < ttl.fresh_s:
+                return entry.value
+            if age_s < ttl.fresh_s + ttl.stale_s:
+                FETCH_SCHEDULER.submit(
+                    ("revalidate", key),
+                    uncancellable(self._refresh),
+                    key,
+                    fetch,
+                    *args,
+                    **kwargs,
+                )
+                return entry.value
+
+        return self._refresh(key, fetch, *args, **kwargs)
+
+    def _refresh(
+        self, key: Hashable, fetch: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        value = fetch(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = _Entry(value=value, fetched_s=time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(
+        self, text: Optional[str] = None, query_type: Optional[QueryType] = None
+    ) -> int:
+        """Drop cached entries, e.g. when new cases are uploaded to a field.
+
+        Drops the entries whose key contains `text` (e.g. a field identifier
+        or a case uuid) and that are of `query_type`, or all entries if
+        neither is given. Returns the number of dropped entries.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (query_type is None or key[0] == query_type)
+                and (text is None or text in repr(key[1]))
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+
+SEARCH_CACHE = SearchCache()
+
+
+def invalidate_search_cache(
+    text: Optional[str] = None, query_type: Optional[QueryType] = None
+) -> int:
+    """Hook for dropping cached search results, see `SearchCache.invalidate`"""
+    return SEARCH_CACHE.invalidate(text=text, query_type=query_type)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a Lucene query string so equivalent queries share a cache
+    entry: whitespace is collapsed, and the terms of a plain conjunction are
+    sorted."""
+    query = re.sub(r"\s+", " ", query).strip()
+    terms = query.split(" AND ")
+    if all(
+        "(" not in term and " OR " not in term and " NOT " not in term for term in terms
+    ):
+        query = " AND ".join(sorted(term.strip() for term in terms))
+    return query
+
+
+def credentials_scope(explorer: Explorer) -> Tuple[Optional[str], str]:
+    """Get the Sumo environment and a digest of the credentials of an
+    explorer, so cached results are only shared between users with the same
+    access"""
+    credentials = sumo_credentials(explorer)
+    token = credentials[1] if credentials is not None else ""
+    return (
+        getattr(explorer.sumo, "base_url", None),
+        hashlib.sha256(token.encode()).hexdigest(),
+    )
+
+
+def search_cache_key(
+    explorer: Explorer, cache_scope: Optional[Hashable], params: Dict[str, Any]
+) -> Hashable:
+    """Get the search cache key of /search parameters, see `cached_search`"""
+    if cache_scope is None:
+        cache_scope = credentials_scope(explorer)
+    normalized = tuple(
+        sorted(
+            (name, normalize_query(value) if name == "query" else repr(value))
+            for name, value in params.items()
+        )
+    )
+    return (cache_scope, normalized)
+
+
+def cached_search(
+    explorer: Explorer,
+    query_type: QueryType,
+    cache_scope: Optional[Hashable] = None,
+    **params: Any,
+) -> Any:
+    """`sumo_get(explorer, "/search", **params)` served from the search cache.
+
+    Results are cached per `cache_scope`, which defaults to the credentials of
+    the explorer. Searches within a case can pass the case scope, see
+    `case_access.case_scope`, to share results between users."""
+    return SEARCH_CACHE.get_or_fetch(
+        search_cache_key(explorer, cache_scope, params),
+        query_type,
+        sumo_get,
+        explorer,
+        "/search",
+        **params,
+    )
+
+
+def cached_fields(explorer: Explorer) -> Dict[str, Any]:
+    """`explorer.get_fields()` served from the search cache"""
+    return SEARCH_CACHE.get_or_fetch(
+        credentials_scope(explorer),
+        QueryType.FIELDS,
+        explorer_call,
+        "/fields",
+        explorer.get_fields,
+    )
@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Callable, Hashable, Iterator, Optional
+
+import pyarrow as pa
+
+from .memory_budget import SPILL_DIRECTORY, is_spilled
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _default_directory() -> Path:
+    # /dev/shm is a tmpfs on Linux, so the files live in shared memory
+    base = (
+        Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+    )
+    return base / "webviz-sumo-tables"
+
+
+class SharedTableStore:
+    """Arrow tables shared between worker processes through files in a
+    (preferably tmpfs) directory.
+
+    Tables are written once by whichever worker fetches them first, and read
+    by every worker as memory mapped Arrow IPC files, so the decoded data is
+    held once in the page cache instead of once per process.
+
+    Writes go to a temporary file that is atomically renamed into place, so
+    readers never see partial files and concurrent writers of the same key are
+    harmless. The index of entries and the eviction are guarded by a file lock.
+    When the total size exceeds `max_bytes`, the least recently read entries
+    are removed; already mapped tables stay valid until they are released.
+    Temporary files left by writers that died are removed by the eviction.
+
+    Storing is best effort: a table that cannot be written (e.g. a full
+    /dev/shm) is logged and not stored, and callers still get the table.
+
+    Tables that were spilled to disk for being over the memory budget (see
+    `memory_budget.is_spilled`) are kept in `spill_store` instead, if given,
+    so a tmpfs store does not copy them back into memory.
+    """
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = ".lock"
+    TMP_PREFIX = ".tmp-"
+    # Temporary table files older than this are left by crashed writers
+    TMP_MAX_AGE_S = 600.0
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        spill_store: Optional["SharedTableStore"] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.spill_store = spill_store
+
+    def _path(self, key: Hashable) -> Path:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.directory / f"{digest}.arrow"
+
+    def get(self, key: Hashable) -> Optional[pa.Table]:
+        path = self._path(key)
+        try:
+            source = pa.memory_map(str(path))
+        except FileNotFoundError:
+            if self.spill_store is not None:
+                return self.spill_store.get(key)
+            return None
+        with pa.ipc.open_file(source) as reader:
+            table = reader.read_all()
+        # The modification time doubles as last access time for the eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return table
+
+    def put(self, key: Hashable, table: pa.Table) -> None:
+        if self.spill_store is not None and is_spilled(table):
+            self.spill_store.put(key, table)
+            return
+        path = self._path(key)
+        try:
+            self._write_table(path, table)
+            with self._locked():
+                index = self._read_index()
+                index[path.name] = {
+                    "size": path.stat().st_size,
+                    "created": time.time(),
+                }
+                self._evict(index)
+                self._write_index(index)
+        except OSError as exc:
+            LOGGER.warning(f"Table not stored in {self.directory}: {exc}")
+            # Not in the index, so it would never be evicted
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _write_table(self, path: Path, table: pa.Table) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=self.TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def remove(self, key: Hashable) -> None:
+        if self.spill_store is not None:
+            self.spill_store.remove(key)
+        path = self._path(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            index = self._read_index()
+            index.pop(path.name, None)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._write_index(index)
+
+    def get_or_fetch(
+        self, key: Hashable, fetch: Callable[..., Optional[pa.Table]], *args, **kwargs
+    ) -> Optional[pa.Table]:
+        """Get the table from the store, or fetch and store it"""
+        table = self.get(key)
+        if table is not None:
+            return table
+        table = fetch(*args, **kwargs)
+        if table is not None:
+            self.put(key, table)
+        return table
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.directory / self.LOCK_FILE, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        try:
+            return json.loads((self.directory / self.INDEX_FILE).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: dict) -> None:
+        tmp_path = self.directory / f"{self.TMP_PREFIX}{self.INDEX_FILE}"
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, self.directory / self.INDEX_FILE)
+
+    def _evict(self, index: dict) -> None:
+        self._remove_orphaned_tmp_files()
+        entries = []
+        for name in list(index):
+            try:
+                entries.append((os.stat(self.directory / name).st_mtime, name))
+            except FileNotFoundError:
+                del index[name]
+        total = sum(index[name]["size"] for _, name in entries)
+        for _, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            total -= index.pop(name)["size"]
+            try:
+                os.unlink(self.directory / name)
+            except FileNotFoundError:
+                pass
+
+    def _remove_orphaned_tmp_files(self) -> None:
+        now = time.time()
+        for path in self.directory.glob(f"{self.TMP_PREFIX}*"):
+            try:
+                if now - path.stat().st_mtime > self.TMP_MAX_AGE_S:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+SHARED_TABLE_STORE = SharedTableStore(
+    directory=Path(os.environ.get("WEBVIZ_SUMO_TABLE_STORE", _default_directory())),
+    max_bytes=int(os.environ.get("WEBVIZ_SUMO_TABLE_STORE_MAX_MB", "2048")) * 2**20,
+    spill_store=SharedTableStore(
+        directory=SPILL_DIRECTORY / "tables",
+        max_bytes=int(os.environ.get("WEBVIZ_SUMO_SPILL_STORE_MAX_MB", "20480"))
+        * 2**20,
+    ),
+)
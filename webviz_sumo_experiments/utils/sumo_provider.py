@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Any, Dict, List, Tuple
+
+import flask
+from fmu.sumo.explorer import Explorer
+from webviz_config.utils import StrEnum
+
+from .case_access import case_scope
+from .search_cache import (
+    SEARCH_CACHE,
+    QueryType,
+    cached_fields,
+    cached_search,
+    invalidate_search_cache,
+)
+from .shared_table_store import SHARED_TABLE_STORE
+from .sumo_query import bucket_keys, build_query, terms_aggregation
+from .sumo_transport import explorer_call
+
+
+class SumoDataType(StrEnum):
+    SUMMARY = "summary"
+    VOLUMES = "volumes"
+
+
+# Filters finding the objects of a data type in a case
+_DATA_TYPE_FILTERS: Dict[SumoDataType, Dict[str, Any]] = {
+    SumoDataType.SUMMARY: {"data.name": "summary"},
+    SumoDataType.VOLUMES: {"data.content": "volumes"},
+}
+
+
+class SumoDataProvider:
+    """Sumo access shared by all Sumo plugins of an app, see
+    `sumo_data_provider`.
+
+    Owns the explorers of the users, the metadata lookups of the case
+    settings (fields, cases, case names and iterations) and the caches, so
+    pages showing the same cases send each request to Sumo once, whichever
+    page asks first.
+    """
+
+    def __init__(self, env: str, interactive: bool, max_explorers: int = 256) -> None:
+        self.env = env
+        self.interactive = interactive
+        self.max_explorers = max_explorers
+        self.search_cache = SEARCH_CACHE
+        self.table_store = SHARED_TABLE_STORE
+        self._explorers: "OrderedDict[str, Explorer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def explorer(self) -> Explorer:
+        """Get the explorer of the user of the running request.
+
+        Explorers are created once per access token (once in total when
+        interactive) and reused by later requests, instead of one per
+        callback. The least recently used are dropped beyond `max_explorers`,
+        e.g. when tokens are renewed."""
+        token = (
+            None
+            if self.interactive
+            else flask.request.headers["X-Auth-Request-Access-Token"]
+        )
+        key = hashlib.sha256(str(token).encode()).hexdigest()
+        with self._lock:
+            explorer = self._explorers.get(key)
+            if explorer is not None:
+                self._explorers.move_to_end(key)
+                return explorer
+
+        if self.interactive:
+            explorer = Explorer(env=self.env, interactive=True)
+        else:
+            explorer = Explorer(env=self.env, token=token)
+        with self._lock:
+            # Another request of the same user may have created one meanwhile
+            explorer = self._explorers.setdefault(key, explorer)
+            self._explorers.move_to_end(key)
+            while len(self._explorers) > self.max_explorers:
+                self._explorers.popitem(last=False)
+        return explorer
+
+    def fields(self, explorer: Explorer) -> List[str]:
+        return list(cached_fields(explorer).keys())
+
+    def case_uuids(
+        self, explorer: Explorer, field: str, data_type: SumoDataType
+    ) -> List[str]:
+        """Get the cases of a field with data of `data_type` in the first
+        realization of the first iteration"""
+        query = build_query(
+            {
+                "class": "table",
+                "masterdata.smda.field.identifier": field,
+                **_DATA_TYPE_FILTERS[data_type],
+                "fmu.realization.id": 0,
+                "fmu.iteration.id": 0,
+            }
+        )
+        response = cached_search(
+            explorer,
+            QueryType.CASES,
+            **terms_aggregation(query, "_sumo.parent_object"),
+        )
+        return bucket_keys(response, "_sumo.parent_object")
+
+    def invalidate_cases(self, field: str) -> int:
+        """Drop the cached case lists of a field, so cases uploaded since are
+        listed. Returns the number of dropped entries."""
+        return invalidate_search_cache(
+            text=build_query({"masterdata.smda.field.identifier": field}),
+            query_type=QueryType.CASES,
+        )
+
+    def case_name(self, explorer: Explorer, case_uuid: str) -> str:
+        return self.search_cache.get_or_fetch(
+            (case_scope(explorer, case_uuid), case_uuid),
+            QueryType.CASE_NAME,
+            explorer_call,
+            f"/objects('{case_uuid}')",
+            lambda: explorer.get_case_by_id(case_uuid).case_name,
+        )
+
+    def iterations(self, explorer: Explorer, case_uuid: str) -> List[dict]:
+        return self.search_cache.get_or_fetch(
+            (case_scope(explorer, case_uuid), case_uuid),
+            QueryType.ITERATIONS,
+            explorer_call,
+            f"/objects('{case_uuid}') iterations",
+            lambda: explorer.get_case_by_id(case_uuid).get_iterations(),
+        )
+
+
+_PROVIDERS: Dict[Tuple[str, bool], SumoDataProvider] = {}
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def sumo_data_provider(env: str, interactive: bool) -> SumoDataProvider:
+    """Get the data provider of a Sumo environment, creating it on first use.
+    Webviz runs a single app per process, so every plugin instance of the
+    app is given the same provider."""
+    with _PROVIDERS_LOCK:
+        provider = _PROVIDERS.get((env, interactive))
+        if provider is None:
+            provider = SumoDataProvider(env=env, interactive=interactive)
+            _PROVIDERS[(env, interactive)] = provider
+        return provider
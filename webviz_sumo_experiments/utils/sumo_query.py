@@ -0,0 +1,47 @@
+from typing import Any, List, Mapping, Union
+
+TermValue = Union[str, int, float]
+
+# Bucket size of terms aggregations, the size fmu-sumo uses per batch. Far
+# above the number of cases of a field or realizations of an ensemble.
+MAX_BUCKETS = 10000
+
+
+def quote(value: str) -> str:
+    """Quote a value as a Lucene phrase. Within a phrase only quotes and
+    backslashes have a special meaning."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def term(field: str, value: TermValue) -> str:
+    """Get a `field:value` clause. Strings are quoted, so names containing
+    spaces, colons etc. (e.g. vector names like WOPR:OP_1) match exactly."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return f"{field}:{quote(str(value))}"
+    return f"{field}:{value}"
+
+
+def build_query(terms: Mapping[str, TermValue]) -> str:
+    """Get a query matching documents where all fields have the given values"""
+    return " AND ".join(term(field, value) for field, value in terms.items())
+
+
+def terms_aggregation(query: str, field: str) -> dict:
+    """Get /search parameters for the distinct values of a field among the
+    matching documents. The values are aggregated by Sumo, so no hits are
+    returned. Sumo returns 10 buckets unless told otherwise, so the bucket
+    size is set to `MAX_BUCKETS`, see `bucket_keys`."""
+    return {"query": query, "buckets": field, "bucketsize": MAX_BUCKETS, "size": 0}
+
+
+def bucket_keys(response: Mapping[str, Any], field: str) -> List[Any]:
+    """Get the distinct values from the response of a terms aggregation.
+    Raises ValueError if the aggregation was truncated, i.e. there were more
+    than `MAX_BUCKETS` distinct values."""
+    aggregation = response.get("aggregations", {}).get(field)
+    if not aggregation:
+        return []
+    if aggregation.get("sum_other_doc_count", 0) > 0:
+        raise ValueError(f"More than {MAX_BUCKETS} distinct values of {field}")
+    return [bucket["key"] for bucket in aggregation["buckets"]]
@@ -0,0 +1,77 @@
+from typing import Any, Dict, Hashable, Iterator, Optional
+
+from fmu.sumo.explorer import Explorer
+
+from .search_cache import SEARCH_CACHE, QueryType, search_cache_key
+from .sumo_transport import sumo_delete, sumo_post
+
+PAGE_SIZE = 500
+# Lifetime of the point in time a paged search reads from, renewed per page
+PIT_KEEP_ALIVE = "1m"
+
+
+def iter_hits(
+    explorer: Explorer,
+    query: str,
+    select: Any = None,
+    page_size: int = PAGE_SIZE,
+    query_type: Optional[QueryType] = None,
+    cache_scope: Optional[Hashable] = None,
+) -> Iterator[dict]:
+    """Iterate over all hits of a search, fetching pages lazily.
+
+    Pages are read from a point in time (PIT) of the index, sorted on
+    `_shard_doc`, with search_after, as `fmu.sumo.explorer` does. The PIT
+    keeps the hits from changing between pages and `_shard_doc` is unique
+    within it, so no hit is skipped or repeated. (Sorting on `_id` is
+    disabled by default since Elasticsearch 8.) The
+    number of requests follows how many hits the caller consumes: breaking
+    out of the loop stops the paging. If `query_type` is given, all hits are
+    fetched at once and served from the search cache as a whole, see
+    `cached_search`, so they are never combined from pages fetched at
+    different times.
+    """
+    params = {"query": query, "size": page_size}
+    if select is not None:
+        params["select"] = select
+    if query_type is None:
+        yield from _iter_pages(explorer, params)
+        return
+    yield from SEARCH_CACHE.get_or_fetch(
+        (search_cache_key(explorer, cache_scope, params), "all hits"),
+        query_type,
+        lambda: list(_iter_pages(explorer, params)),
+    )
+
+
+def _iter_pages(explorer: Explorer, params: Dict[str, Any]) -> Iterator[dict]:
+    body: Dict[str, Any] = {
+        "query": {"query_string": {"query": params["query"]}},
+        "size": params["size"],
+        "sort": [{"_shard_doc": "asc"}],
+    }
+    if "select" in params:
+        body["_source"] = params["select"]
+    pit_id = sumo_post(explorer, "/pit", **{"keep-alive": PIT_KEEP_ALIVE})["id"]
+    try:
+        while True:
+            body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+            response = sumo_post(explorer, "/search", body)
+            pit_id = response.get("pit_id", pit_id)
+            hits = response["hits"]["hits"]
+            yield from hits
+            if len(hits) < params["size"]:
+                return
+            body["search_after"] = hits[-1]["sort"]
+    finally:
+        # Also when the caller stops early; unreleased PITs expire by themselves
+        try:
+            sumo_delete(explorer, "/pit", id=pit_id)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+def blob_size(hit: dict) -> int:
+    """Get the size of the blob of a search hit in bytes, from its metadata.
+    The search must select "_sumo.blob_size"; 0 if it is missing."""
+    return hit.get("_source", {}).get("_sumo", {}).get("blob_size", 0)
@@ -0,0 +1,223 @@
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from fmu.sumo.explorer import Explorer
+import httpx
+
+from .callback_trace import record_call
+from .cancellation import check_cancelled
+
+try:
+    import h2  # pylint: disable=unused-import
+
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Limits per Sumo environment. Blob downloads are redirected to the blob
+# storage host, which shares the pool (and so the cap) of its environment.
+MAX_CONNECTIONS = 16
+MAX_KEEPALIVE_CONNECTIONS = 16
+KEEPALIVE_EXPIRY_S = 120
+TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+# Size of the chunks blob downloads to disk are written in
+DOWNLOAD_CHUNK_BYTES = 2**20
+
+T = TypeVar("T")
+
+_CLIENTS: Dict[str, httpx.Client] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _client_for(base_url: str) -> httpx.Client:
+    """Get the pooled client for a Sumo environment, creating it on first use.
+    httpx clients are thread safe, so a single client serves all callbacks."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(base_url)
+        if client is None:
+            client = httpx.Client(
+                http2=HTTP2,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_S,
+                ),
+                timeout=TIMEOUT,
+                # Search responses are large, repetitive JSON
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+            _CLIENTS[base_url] = client
+        return client
+
+
+def sumo_credentials(explorer: Explorer) -> Optional[Tuple[str, str]]:
+    """Get the base url and a current access token of the Sumo client of an
+    explorer, or None if the client does not expose them, in which case
+    requests go through the client itself.
+
+    This is the only place relying on the internals of the client: recent
+    sumo-wrapper versions return the token from `authenticate()`, older ones
+    only from the private `_retrieve_token()`.
+    """
+    sumo = explorer.sumo
+    base_url = getattr(sumo, "base_url", None)
+    retrieve_token = getattr(sumo, "authenticate", None) or getattr(
+        sumo, "_retrieve_token", None
+    )
+    if base_url is None or retrieve_token is None:
+        return None
+    token = retrieve_token()
+    if not token:
+        return None
+    return base_url, token
+
+
+def sumo_get(explorer: Explorer, path: str, **params: Any) -> Any:
+    """Drop-in replacement for `explorer.sumo.get` that sends the request over
+    a pooled keep-alive connection shared by all explorers of the same
+    environment, instead of opening a new connection per request.
+
+    The explorer still owns authentication; only its token is used here.
+    Falls back to `explorer.sumo.get` for clients that do not expose a base
+    url and token, see `sumo_credentials`. Superseded callbacks are cancelled here, before the request
+    is sent.
+    """
+    check_cancelled()
+    credentials = sumo_credentials(explorer)
+    start_s = time.perf_counter()
+    status: Optional[int] = None
+    num_bytes = 0
+    try:
+        if credentials is None:
+            result = explorer.sumo.get(path, **params)
+            status = 200
+            if isinstance(result, bytes):
+                num_bytes = len(result)
+            return result
+
+        base_url, token = credentials
+        is_blob = path.endswith("/blob")
+        response = _client_for(base_url).get(
+            f"{base_url}{path}",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+            follow_redirects=is_blob,
+        )
+        status = response.status_code
+        num_bytes = len(response.content)
+        response.raise_for_status()
+        if is_blob:
+            return response.content
+        return response.json()
+    finally:
+        record_call("GET", path, _summarize(params), status, num_bytes, start_s=start_s)
+
+
+def sumo_download(explorer: Explorer, path: str, target: Path) -> int:
+    """Download a blob to a file in chunks, without holding the whole blob in
+    memory, see `sumo_get`. Returns the number of bytes written."""
+    check_cancelled()
+    credentials = sumo_credentials(explorer)
+    start_s = time.perf_counter()
+    status: Optional[int] = None
+    num_bytes = 0
+    try:
+        with open(target, "wb") as sink:
+            if credentials is None:
+                content = explorer.sumo.get(path)
+                status = 200
+                num_bytes = sink.write(content)
+                return num_bytes
+
+            base_url, token = credentials
+            with _client_for(base_url).stream(
+                "GET",
+                f"{base_url}{path}",
+                headers={"Authorization": f"Bearer {token}"},
+                follow_redirects=True,
+            ) as response:
+                status = response.status_code
+                response.raise_for_status()
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_BYTES):
+                    check_cancelled()
+                    num_bytes += sink.write(chunk)
+        return num_bytes
+    finally:
+        record_call("GET", path, "stream to disk", status, num_bytes, start_s=start_s)
+
+
+def sumo_post(
+    explorer: Explorer, path: str, body: Optional[Any] = None, **params: Any
+) -> Any:
+    """POST a JSON body (e.g. a search in the Elasticsearch query DSL) over the
+    pooled connections, see `sumo_get`. Returns the decoded JSON response."""
+    return _send_json(explorer, "POST", path, body, params)
+
+
+def sumo_delete(explorer: Explorer, path: str, **params: Any) -> None:
+    """DELETE a Sumo resource over the pooled connections, see `sumo_get`"""
+    _send_json(explorer, "DELETE", path, None, params)
+
+
+def _send_json(
+    explorer: Explorer,
+    method: str,
+    path: str,
+    body: Optional[Any],
+    params: Dict[str, Any],
+) -> Any:
+    check_cancelled()
+    credentials = sumo_credentials(explorer)
+    start_s = time.perf_counter()
+    status: Optional[int] = None
+    num_bytes = 0
+    try:
+        if credentials is None:
+            if method == "POST":
+                response = explorer.sumo.post(path, json=body, params=params)
+            else:
+                response = explorer.sumo.delete(path, params=params)
+        else:
+            base_url, token = credentials
+            response = _client_for(base_url).request(
+                method,
+                f"{base_url}{path}",
+                params=params,
+                json=body,
+                headers={"Authorization": f"Bearer {token}"},
+            )
+        status = response.status_code
+        num_bytes = len(response.content)
+        response.raise_for_status()
+        return response.json() if response.content else None
+    finally:
+        record_call(
+            method, path, _summarize(params), status, num_bytes, start_s=start_s
+        )
+
+
+def explorer_call(endpoint: str, func: Callable[..., T], *args: Any) -> T:
+    """Run Sumo requests made by the explorer itself (e.g.
+    `explorer.get_case_by_id`) rather than through `sumo_get`, recording
+    them as one call to `endpoint` in the callback trace"""
+    check_cancelled()
+    start_s = time.perf_counter()
+    status: Optional[int] = None
+    try:
+        result = func(*args)
+        status = 200
+        return result
+    finally:
+        record_call("GET", endpoint, "via explorer", status, 0, start_s=start_s)
+
+
+def _summarize(params: Dict[str, Any], max_length: int = 120) -> str:
+    """Get a short description of the request parameters for the call trace"""
+    summary = " ".join(
+        f"{name}={' '.join(str(value).split())}" for name, value in params.items()
+    )
+    if len(summary) > max_length:
+        summary = summary[: max_length - 3] + "..."
+    return summary